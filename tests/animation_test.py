@@ -0,0 +1,150 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Test animation.py for vimiv's test suite."""
+
+import os
+import tempfile
+import time
+from unittest import TestCase, main
+
+from gi import require_version
+require_version("Gtk", "3.0")
+from gi.repository import GdkPixbuf, GLib
+from PIL import Image
+
+from vimiv.animation import Animation, PILFrameSource, PixbufFrameSource
+
+
+def wait_for_frame(animation):
+    """Return the next frame of animation once it was decoded."""
+    for _ in range(500):
+        frame = animation.get_frame()
+        if frame:
+            return frame
+        time.sleep(0.01)
+    raise TimeoutError("Frame was not decoded")
+
+
+class BrokenFrameSource:
+    """Frame source whose third frame cannot be decoded."""
+
+    width = 40
+    height = 20
+    n_frames = 3
+
+    def __init__(self):
+        self.position = 0
+
+    def restart(self):
+        """Start again at the first frame."""
+        self.position = 0
+
+    def next_frame(self):
+        """Return the next frame, fail for the third one."""
+        if self.position == 2:
+            raise IOError("Broken frame")
+        self.position += 1
+        pixbuf = GdkPixbuf.Pixbuf.new(GdkPixbuf.Colorspace.RGB, False, 8,
+                                      self.width, self.height)
+        return pixbuf, 50
+
+    def close(self):
+        """Nothing to release."""
+
+
+class AnimationTest(TestCase):
+    """Animation Tests."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory(prefix="vimiv-tests-")
+        cls.path = os.path.join(cls.tmpdir.name, "animation.gif")
+        cls.apng = os.path.join(cls.tmpdir.name, "animation.png")
+        frames = [Image.new("RGB", (40, 20), color)
+                  for color in ["red", "green", "blue"]]
+        for path in [cls.path, cls.apng]:
+            frames[0].save(path, save_all=True, append_images=frames[1:],
+                           duration=50, loop=0)
+
+    def setUp(self):
+        self.animation = Animation(PixbufFrameSource(self.path))
+
+    def test_source(self):
+        """Read size and amount of frames."""
+        source = self.animation.source
+        self.assertEqual((source.width, source.height), (40, 20))
+        self.assertEqual(source.n_frames, 3)
+
+    def test_cached_playback(self):
+        """Replay all frames from the cache."""
+        self.assertTrue(self.animation.is_cached())
+        for _ in range(4):
+            pixbuf, delay = wait_for_frame(self.animation)
+            self.assertEqual(pixbuf.get_width(), 40)
+            self.assertEqual(delay, 50)
+        # Loop started again
+        self.assertEqual(self.animation.shown, 0)
+        self.assertEqual(len(self.animation.frames), 3)
+
+    def test_streamed_playback(self):
+        """Release frames after showing them if they do not fit the cache."""
+        self.animation.stop()
+        self.animation = Animation(PixbufFrameSource(self.path), max_bytes=0,
+                                   lookahead=2)
+        self.assertFalse(self.animation.is_cached())
+        for _ in range(4):
+            wait_for_frame(self.animation)
+            self.assertLessEqual(len(self.animation.frames), 2)
+
+    def test_zoom(self):
+        """Scale frames to the zoom level and continue at the shown frame."""
+        wait_for_frame(self.animation)
+        wait_for_frame(self.animation)
+        self.animation.set_zoom(0.5)
+        self.assertEqual(self.animation.get_scaled_size(), (20, 10))
+        pixbuf, _ = wait_for_frame(self.animation)
+        self.assertEqual(pixbuf.get_width(), 20)
+        self.assertEqual(self.animation.shown, 1)
+
+    def test_pil_source(self):
+        """Stream frames of formats GdkPixbuf cannot animate using PIL."""
+        self.animation.stop()
+        self.animation = Animation(PILFrameSource(self.apng), max_bytes=0,
+                                   lookahead=2)
+        self.assertEqual(self.animation.source.n_frames, 3)
+        colors = []
+        for _ in range(4):
+            pixbuf, delay = wait_for_frame(self.animation)
+            self.assertEqual(delay, 50)
+            self.assertTrue(pixbuf.get_has_alpha())
+            colors.append(pixbuf.get_pixels()[:3])
+        # Frames differ and the loop starts again
+        self.assertEqual(len(set(colors)), 3)
+        self.assertEqual(colors[0], colors[3])
+
+    def test_broken_frame(self):
+        """Keep playing the frames decoded before a broken frame."""
+        self.animation.stop()
+        errors = []
+        self.animation = Animation(BrokenFrameSource(),
+                                   error_callback=errors.append)
+        shown = []
+        for _ in range(4):
+            wait_for_frame(self.animation)
+            shown.append(self.animation.shown)
+        self.assertEqual(shown, [0, 1, 0, 1])
+        self.assertFalse(self.animation.stopped)
+        context = GLib.MainContext.default()
+        while context.pending():
+            context.iteration(False)
+        self.assertIsInstance(errors[0], IOError)
+
+    def tearDown(self):
+        self.animation.stop()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -54,6 +54,7 @@ class ConfigparserTest(TestCase):
         settings = {"GENERAL": {"start_fullscreen": "yes",
                                 "start_slideshow": "yes",
                                 "shuffle": "yes",
+                                "sort": "mtime",
                                 "display_bar": "no",
                                 "default_thumbsize": "(256, 256)",
                                 "geometry": "400x400",
@@ -85,6 +86,7 @@ class ConfigparserTest(TestCase):
         self.assertEqual(general["start_fullscreen"], True)
         self.assertEqual(general["start_slideshow"], True)
         self.assertEqual(general["shuffle"], True)
+        self.assertEqual(general["sort"], "mtime")
         self.assertEqual(general["display_bar"], False)
         self.assertEqual(general["default_thumbsize"], (256, 256))
         self.assertEqual(general["geometry"], "400x400")
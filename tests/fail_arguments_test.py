@@ -23,10 +23,11 @@ class FailingArgTest(VimivTestCase):
                     "fit_horiz", "fit_vert", "focus_library", "fullscreen",
                     "last", "last_lib", "library", "manipulate", "mark",
                     "mark_all", "mark_between", "move_up", "next", "next!",
-                    "prev", "prev!", "q", "q!", "reload_lib", "set animation!",
-                    "set clipboard!", "set overzoom!", "set rescale_svg!",
-                    "set show_hidden!", "set statusbar!", "slideshow",
-                    "thumbnail", "unfocus_library", "version"]:
+                    "perf", "perf_dump", "prev", "prev!", "q", "q!",
+                    "reload_lib", "set animation!", "set clipboard!",
+                    "set overzoom!", "set rescale_svg!", "set show_hidden!",
+                    "set statusbar!", "slideshow", "thumbnail",
+                    "unfocus_library", "version"]:
             self.fail_arguments(cmd, 1, too_many=True)
         # 1 Argument optional
         for cmd in ["grow_lib", "set brightness", "set contrast",
@@ -34,7 +35,8 @@ class FailingArgTest(VimivTestCase):
                     "shrink_lib", "zoom_in", "zoom_out", "zoom_to"]:
             self.fail_arguments(cmd, 2, too_many=True)
         # 1 Argument required
-        for cmd in ["flip", "format", "rotate", "slideshow_delay", "tag_write",
+        for cmd in ["flip", "format", "rotate", "slideshow_delay", "sort",
+                    "tag_write",
                     "tag_load", "tag_remove", "undelete"]:
             self.fail_arguments(cmd, 2, too_many=True)
             self.fail_arguments(cmd, 0, too_many=False)
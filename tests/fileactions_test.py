@@ -10,7 +10,7 @@ require_version("Gtk", "3.0")
 from gi.repository import Gtk, Gdk
 import vimiv.fileactions as fileactions
 
-from vimiv_testcase import VimivTestCase
+from vimiv_testcase import VimivTestCase, refresh_gui
 
 
 class FileActionsTest(VimivTestCase):
@@ -28,6 +28,22 @@ class FileActionsTest(VimivTestCase):
         self.assertTrue(fileactions.is_image("arch_001.jpg"))
         self.assertFalse(fileactions.is_image("not_an_image.jpg"))
 
+    def test_populate_trust_extensions(self):
+        """Only check files with unknown extensions in large filelists."""
+        os.chdir("testimages/")
+        not_an_image = os.path.abspath("not_an_image.jpg")
+        # Every file is checked
+        paths = fileactions.populate(["arch_001.jpg"])[0]
+        self.assertNotIn(not_an_image, paths)
+        self.assertIn(os.path.abspath("symlink_to_image"), paths)
+        paths = fileactions.populate(["arch_001.jpg"], check_amount=100)[0]
+        self.assertNotIn(not_an_image, paths)
+        # Extensions are trusted, files without extension are still checked
+        paths = fileactions.populate(["arch_001.jpg"], check_amount=0)[0]
+        self.assertIn(not_an_image, paths)
+        self.assertIn(os.path.abspath("symlink_to_image"), paths)
+        self.assertNotIn(os.path.abspath("animation"), paths)
+
     def test_format_files(self):
         """Format files according to a formatstring."""
         shutil.copytree("testimages/", "testimages_to_format/")
@@ -35,6 +51,7 @@ class FileActionsTest(VimivTestCase):
         self.vimiv.quit()
         self.init_test(["arch_001.jpg"])
         self.vimiv["fileextras"].format_files("formatted_")
+        self.wait_for_format()
         files = [fil for fil in os.listdir() if "formatted_" in fil]
         files = sorted(files)
         expected_files = ["formatted_001.jpg", "formatted_002",
@@ -51,6 +68,19 @@ class FileActionsTest(VimivTestCase):
         self.vimiv["fileextras"].format_files("formatted_")
         self.check_statusbar("INFO: Format only works on opened image files")
 
+    def test_format_file_list(self):
+        """Keep formatted images in a list of single files."""
+        shutil.copytree("testimages/", "testimages_to_format/")
+        os.chdir("testimages_to_format")
+        self.vimiv.quit()
+        self.init_test(["arch_001.jpg", "vimiv.bmp"])
+        self.assertFalse(self.vimiv.paths_from_directory)
+        self.vimiv["fileextras"].format_files("formatted_")
+        self.wait_for_format()
+        expected = [os.path.abspath(fil)
+                    for fil in ["formatted_001.jpg", "formatted_002.bmp"]]
+        self.assertEqual(self.vimiv.paths, expected)
+
     def test_format_files_with_exif(self):
         """Format files according to a formatstring with EXIF data."""
         # File contains exif data
@@ -60,13 +90,95 @@ class FileActionsTest(VimivTestCase):
         self.init_test(["arch_001.jpg"])
         self.vimiv.paths = [os.path.abspath("arch_001.jpg")]
         self.vimiv["fileextras"].format_files("formatted_%Y_")
+        self.wait_for_format()
         self.assertIn("formatted_2016_001.jpg", os.listdir())
         # File does not contain exif data
         self.vimiv.paths = [os.path.abspath("arch-logo.png")]
         self.vimiv["fileextras"].format_files("formatted_%Y_")
+        self.wait_for_format()
         message = self.vimiv["statusbar"].left_label.get_text()
         self.assertIn("No exif data for", message)
 
+    def test_format_stopped(self):
+        """Move files back from temporary names if formatting stops."""
+        shutil.copytree("testimages/", "testimages_to_format/")
+        os.chdir("testimages_to_format")
+        fileextras = self.vimiv["fileextras"]
+        source = os.path.abspath("vimiv.bmp")
+        temporary = os.path.abspath(".vimiv-format-test")
+        fileextras.format_moved = {temporary: source}
+        fileextras._rename_chunk([(source, temporary),
+                                  (os.path.abspath("not_a_file"),
+                                   os.path.abspath("new_001.bmp"))])
+        self.assertIn("vimiv.bmp", os.listdir())
+        self.assertNotIn(".vimiv-format-test", os.listdir())
+        self.assertIn("Formatting stopped",
+                      self.vimiv["statusbar"].left_label.get_text())
+        # Formatting can be started again after reading exif data failed
+        fileextras.format_id = -1
+        fileextras._on_format_error(OSError("database is locked"))
+        self.assertEqual(fileextras.format_id, 0)
+
+    def test_plan_format(self):
+        """Plan formatting and detect collisions."""
+        os.chdir("testimages/")
+        paths = [os.path.abspath(fil) for fil in ["arch_001.jpg", "vimiv.bmp"]]
+        renames = fileactions.plan_format(paths, "new_", {})
+        expected = [(paths[0], os.path.abspath("new_001.jpg")),
+                    (paths[1], os.path.abspath("new_002.bmp"))]
+        self.assertEqual(renames, expected)
+        # Existing files are not overwritten
+        with self.assertRaises(ValueError):
+            fileactions.plan_format(paths, "arch_", {})
+        # Files taking the name of another file are moved temporarily
+        os.chdir("..")
+        shutil.copytree("testimages/", "testimages_to_format/")
+        os.chdir("testimages_to_format")
+        shutil.copyfile("arch_001.jpg", "arch_002.jpg")
+        paths = [os.path.abspath(fil) for fil in ["arch_002.jpg",
+                                                  "arch_001.jpg"]]
+        renames = fileactions.plan_format(paths, "arch_", {})
+        temporaries = [target for _, target in renames[:2]]
+        for temporary in temporaries:
+            self.assertTrue(
+                os.path.basename(temporary).startswith(".vimiv-format-"))
+        self.assertEqual(renames[2:], [(temporaries[0], paths[1]),
+                                       (temporaries[1], paths[0])])
+        # Applying the plan swaps the files
+        size = os.path.getsize(paths[1])
+        shutil.copyfile("vimiv.bmp", "arch_002.jpg")
+        for source, target in renames:
+            os.rename(source, target)
+        self.assertEqual(os.path.getsize(paths[0]), size)
+        self.assertFalse([fil for fil in os.listdir()
+                          if fil.startswith(".vimiv-format-")])
+
+    def test_reload_changes(self):
+        """Only apply the changes of the directory when reloading."""
+        shutil.copytree("testimages/", "testimages_to_format/")
+        os.chdir("testimages_to_format")
+        self.vimiv.quit()
+        self.init_test(["vimiv.bmp"])
+        self.vimiv.paths[:] = sorted(self.vimiv.paths)
+        self.vimiv.index = self.vimiv.paths.index(os.path.abspath("vimiv.bmp"))
+        # Order of unchanged images is kept, new images are inserted sorted
+        os.remove("vimiv.tiff")
+        shutil.copyfile("arch_001.jpg", "arch_002.jpg")
+        shutil.copyfile("not_an_image.jpg", "not_an_image_either.jpg")
+        self.vimiv["fileextras"].reload_changes(os.getcwd())
+        expected_images = ["arch-logo.png", "arch_001.jpg", "arch_002.jpg",
+                           "symlink_to_image", "vimiv.bmp", "vimiv.svg"]
+        expected_images = [os.path.abspath(image) for image in expected_images]
+        self.assertEqual(self.vimiv.paths, expected_images)
+        # The current image stays the same although an image was added before
+        self.assertEqual(self.vimiv.paths[self.vimiv.index],
+                         os.path.abspath("vimiv.bmp"))
+        # Images which are no longer images are removed
+        shutil.copyfile("not_an_image.jpg", "arch_002.jpg")
+        os.utime("arch_002.jpg", (0, 0))
+        self.vimiv["fileextras"].reload_changes(os.getcwd())
+        self.assertNotIn(os.path.abspath("arch_002.jpg"), self.vimiv.paths)
+
     def test_clipboard(self):
         """Copy image name to clipboard."""
         def compare_text(clipboard, text, expected_text):
@@ -97,6 +209,11 @@ class FileActionsTest(VimivTestCase):
         clipboard.request_text(compare_text, basename)
         self.assertTrue(self.compare_result)
 
+    def wait_for_format(self):
+        """Wait until format_files renamed all files."""
+        while self.vimiv["fileextras"].format_id:
+            refresh_gui(0.01)
+
     def tearDown(self):
         os.chdir(self.test_directory)
         if os.path.isdir("testimages_to_format"):
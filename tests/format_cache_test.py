@@ -0,0 +1,63 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Test format_cache.py for vimiv's test suite."""
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase, main
+
+from gi import require_version
+require_version("Gtk", "3.0")
+from PIL import Image
+
+from vimiv import format_cache
+
+
+class FormatCacheTest(TestCase):
+    """Format cache Tests."""
+
+    def setUp(self):
+        format_cache.clear()
+        self.tmpdir = tempfile.TemporaryDirectory(prefix="vimivtests-")
+        self.image = os.path.join(self.tmpdir.name, "image")
+        shutil.copyfile("vimiv/testimages/arch_001.jpg", self.image)
+
+    def test_get_format_info(self):
+        """Receive format information of images."""
+        info = format_cache.get_format_info(self.image)
+        self.assertEqual(info.name, "jpeg")
+        self.assertEqual(info.mime_type, "image/jpeg")
+        self.assertEqual(info.width, 1920)
+        self.assertFalse(info.animated)
+        # No image
+        self.assertIsNone(format_cache.get_format_info(
+            "vimiv/testimages/not_an_image.jpg"))
+        # Non-existing file
+        self.assertIsNone(format_cache.get_format_info("not_a_file"))
+
+    def test_invalidate(self):
+        """Probe again once the file changed."""
+        self.assertTrue(format_cache.get_format_info(self.image))
+        shutil.copyfile("vimiv/testimages/arch-logo.png", self.image)
+        info = format_cache.get_format_info(self.image)
+        self.assertEqual(info.name, "png")
+        os.remove(self.image)
+        self.assertIsNone(format_cache.get_format_info(self.image))
+
+    def test_animated_png(self):
+        """Detect animated PNG files which are played using PIL."""
+        info = format_cache.get_format_info("vimiv/testimages/arch-logo.png")
+        self.assertFalse(info.animated)
+        frames = [Image.new("RGB", (10, 10), color)
+                  for color in ["red", "blue"]]
+        frames[0].save(self.image, "PNG", save_all=True,
+                       append_images=frames[1:])
+        info = format_cache.get_format_info(self.image)
+        self.assertTrue(info.animated)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Test image_header.py for vimiv's test suite."""
+
+import os
+import tempfile
+from unittest import TestCase, main
+
+from gi import require_version
+require_version("Gtk", "3.0")
+from PIL import Image
+
+from vimiv import image_header
+
+
+class ImageHeaderTest(TestCase):
+    """Image header Tests."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory(prefix="vimivtests-")
+        cls.image = Image.new("RGB", (123, 45), "red")
+
+    def setUp(self):
+        image_header.clear()
+
+    def save(self, name, **kwargs):
+        """Save the test image as name and return the path to it."""
+        path = os.path.join(self.tmpdir.name, name)
+        self.image.save(path, **kwargs)
+        return path
+
+    def test_formats(self):
+        """Read width and height of all supported formats."""
+        paths = [self.save("image.jpg"),
+                 self.save("progressive.jpg", progressive=True),
+                 self.save("image.png"),
+                 self.save("image.gif"),
+                 self.save("lossy.webp", lossless=False),
+                 self.save("lossless.webp", lossless=True),
+                 self.save("animated.webp", save_all=True,
+                           append_images=[self.image]),
+                 self.save("image.tiff")]
+        for path in paths:
+            header = image_header.read_header(path)
+            self.assertEqual((header.width, header.height), (123, 45), path)
+
+    def test_orientation(self):
+        """Read the EXIF orientation of JPEG files."""
+        exif = Image.Exif()
+        exif[274] = 6
+        path = self.save("rotated.jpg", exif=exif.tobytes())
+        self.assertEqual(image_header.read_header(path).orientation, 6)
+        path = self.save("image.jpg")
+        self.assertEqual(image_header.read_header(path).orientation, 1)
+
+    def test_invalid(self):
+        """Return None for unsupported files."""
+        self.assertIsNone(
+            image_header.read_header("vimiv/testimages/not_an_image.jpg"))
+        self.assertIsNone(image_header.get_header("not_a_file"))
+        # Truncated headers
+        for start in [b"RIFF\0\0\0\0WEBPVP8L", b"RIFF\0\0\0\0WEBPVP8X",
+                      b"\x89PNG\r\n\x1a\n"]:
+            path = os.path.join(self.tmpdir.name, "truncated")
+            with open(path, "wb") as f:
+                f.write(start)
+            image_header.clear()
+            self.assertIsNone(image_header.read_header(path))
+
+    def test_get_header_cached(self):
+        """Cache the results of probing files."""
+        path = self.save("image.png")
+        self.assertEqual(image_header.get_header(path).width, 123)
+        # pylint: disable=protected-access
+        self.assertIn(os.path.abspath(path), image_header._cache)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -68,6 +68,34 @@ class ImageTest(VimivTestCase):
         self.assertEqual(width * self.image.get_zoom_percent_to_fit(),
                          pixbuf.get_width())
 
+    def test_quick_zoom(self):
+        """Show a quick preview when zooming and refine it afterwards."""
+        width = 1920
+        self.image.zoom_to(0.5)
+        self.assertFalse(self.image.refine_id)
+        self.image.zoom_delta()
+        self.assertTrue(self.image.refine_id)
+        pixbuf = self.image.image.get_pixbuf()
+        self.assertEqual(int(width * 0.625), pixbuf.get_width())
+        # A new step replaces the pending refinement
+        refine_id = self.image.refine_id
+        self.image.zoom_delta(zoom_in=False)
+        self.assertNotEqual(refine_id, self.image.refine_id)
+        # Refine the preview
+        refresh_gui(self.image.refine_delay / 1000 + 0.05)
+        self.assertFalse(self.image.refine_id)
+        pixbuf = self.image.image.get_pixbuf()
+        self.assertEqual(int(width * 0.5), pixbuf.get_width())
+
+    def test_decode_to_fit(self):
+        """Decode the full resolution only when zooming in."""
+        self.image.zoom_to(0, 1)
+        self.assertLess(self.image.pixbuf_original.get_width(), 1920)
+        self.assertEqual(self.image.get_original_size()[0], 1920)
+        self.image.zoom_to(1)
+        self.assertEqual(self.image.pixbuf_original.get_width(), 1920)
+        self.image.zoom_to(0, 1)
+
     def test_zoom_from_commandline(self):
         """Test zooming from command line."""
         # Zoom in
@@ -114,6 +142,51 @@ class ImageTest(VimivTestCase):
         self.image.move_pos(forward=False)
         self.assertEqual(0, self.vimiv.index)
 
+    def test_skim(self):
+        """Only load the image at which held navigation keys stop."""
+        self.image.move_index(key=True)
+        self.assertFalse(self.image.load_id)
+        # Repeated key, image is skimmed
+        self.image.move_index(key=True)
+        self.assertEqual(2, self.vimiv.index)
+        self.assertTrue(self.image.load_id)
+        # Nothing of the previous image replaces the preview
+        self.assertFalse(self.image.timer_id)
+        self.assertFalse(self.image.refine_id)
+        self.assertFalse(self.image.is_anim)
+        # Loaded once navigation stopped
+        refresh_gui(self.image.skim_delay / 1000 + 0.05)
+        self.assertFalse(self.image.load_id)
+        self.image.move_index(delta=-2)
+        self.assertEqual(0, self.vimiv.index)
+
+    def test_release_hidden(self):
+        """Release the image while only the library is shown."""
+        self.image.scrolled_win.hide()
+        self.assertTrue(self.image.released)
+        self.assertIsNone(self.image.image.get_pixbuf())
+        self.image.scrolled_win.show()
+        refresh_gui()
+        self.assertFalse(self.image.released)
+        self.assertIsNotNone(self.image.image.get_pixbuf())
+
+    def test_restore_rotated(self):
+        """Show rotations not written to the file after restoring."""
+        manipulate = self.vimiv["manipulate"]
+        width = self.image.pixbuf_original.get_width()
+        height = self.image.pixbuf_original.get_height()
+        manipulate.rotate(1)
+        self.image.scrolled_win.hide()
+        self.image.scrolled_win.show()
+        refresh_gui()
+        self.assertFalse(self.image.released)
+        self.assertEqual((self.image.pixbuf_original.get_width(),
+                          self.image.pixbuf_original.get_height()),
+                         (height, width))
+        # Do not change the file
+        manipulate.rotate(-1)
+        manipulate.simple_manipulations.clear()
+
     def test_toggles(self):
         """Toggle image.py settings."""
         # Rescale svg
@@ -222,5 +295,27 @@ class ImageTest(VimivTestCase):
         self.assertEqual(v_adj.get_value(), v_middle)
 
 
+class SvgImageTest(VimivTestCase):
+    """Rescaling of vector graphics Test."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.init_test(cls, ["vimiv/testimages/vimiv.svg"])
+        cls.image = cls.vimiv["image"]
+
+    def test_rasterize_in_background(self):
+        """Rasterize vector graphics in the background when zooming."""
+        self.image.zoom_to(2)
+        height = int(self.image.get_original_size()[1] * 2)
+        # Scaled preview is shown at the correct size
+        self.assertEqual(height, self.image.image.get_pixbuf().get_height())
+        path = self.vimiv.paths[self.vimiv.index]
+        while self.image.svg_pending:
+            refresh_gui(0.01)
+        self.assertIn((path, height), self.image.svg_cache)
+        self.assertIs(self.image.svg_cache[(path, height)],
+                      self.image.image.get_pixbuf())
+
+
 if __name__ == "__main__":
     main()
@@ -2,13 +2,16 @@
 """Test library.py for vimiv's test suite."""
 
 import os
+import shutil
+import tempfile
+import time
 from unittest import main
 
 from gi import require_version
 require_version("Gtk", "3.0")
 from gi.repository import Gtk
 
-from vimiv_testcase import VimivTestCase
+from vimiv_testcase import VimivTestCase, refresh_gui
 
 
 class LibraryTest(VimivTestCase):
@@ -196,6 +199,98 @@ class LibraryTest(VimivTestCase):
         self.assertNotIn(sym, self.lib.files)
         os.remove(sym)
 
+    def test_count_images(self):
+        """Count the images of directories in the background."""
+        self.lib.listings.clear()
+        self.lib.reload(".")
+        index = self.lib.files.index("directory")
+        model = self.lib.treeview.get_model()
+        self.assertEqual(model[index][2], self.lib.pending_marker)
+        while self.lib.filesize["directory"] == self.lib.pending_marker:
+            refresh_gui(0.01)
+        self.assertEqual(model[index][2], "1")
+        # Counts of a previous listing are dropped
+        generation = self.lib.count_generation
+        self.lib._on_counted("directory", "42", generation - 1)
+        self.assertEqual(model[index][2], "1")
+
+    def test_cached_listing(self):
+        """Reuse listings of directories which did not change."""
+        self.lib.reload(".")
+        self.assertIn(os.getcwd(), self.lib.listings)
+        filesize = self.lib.filesize
+        self.lib.move_up("directory")
+        self.lib.move_up()
+        self.assertIs(self.lib.filesize, filesize)
+        # Changed directories are listed again
+        refresh_gui(0.05)
+        shutil.copyfile("arch-logo.png", "arch-logo-copy.png")
+        self.lib.reload(".")
+        self.assertIsNot(self.lib.filesize, filesize)
+        self.assertIn("arch-logo-copy.png", self.lib.files)
+        os.remove("arch-logo-copy.png")
+
+    def test_large_directory(self):
+        """Benchmark listing a directory with 10k entries."""
+        before = os.getcwd()
+        with tempfile.TemporaryDirectory(prefix="vimivtests-") as directory:
+            for i in range(9900):
+                shutil.copyfile(os.path.join(before, "arch-logo.png"),
+                                os.path.join(directory, "%05d.png" % (i)))
+            for i in range(100):
+                os.mkdir(os.path.join(directory, "directory%03d" % (i)))
+            start = time.time()
+            self.lib.move_up(directory)
+            elapsed = time.time() - start
+            self.assertEqual(len(self.lib.files), 10000)
+            self.assertLess(elapsed, 5)
+            # Only rows which are shown are created, also when jumping
+            self.lib.move_pos()
+            refresh_gui()
+            self.assertEqual(self.vimiv.get_pos(True), "directory099")
+            self.assertLess(len(self.lib.fileinfo), 1000)
+            self.lib.move_up(before)
+
+    def test_unsupported_trusted_file(self):
+        """Remove files trusted by their extension once they are shown."""
+        before = os.getcwd()
+        settings = self.vimiv.settings["GENERAL"]
+        check_amount = settings["image_check_amount"]
+        with tempfile.TemporaryDirectory(prefix="vimivtests-") as directory:
+            for name in ["a.png", "b.png"]:
+                shutil.copyfile(os.path.join(before, "arch-logo.png"),
+                                os.path.join(directory, name))
+            with open(os.path.join(directory, "broken.png"), "w") as f:
+                f.write("No image")
+            settings["image_check_amount"] = 1
+            self.lib.move_up(directory)
+            self.assertIn("broken.png", self.lib.files)
+            refresh_gui()
+            self.assertEqual(self.lib.files, ["a.png", "b.png"])
+            settings["image_check_amount"] = check_amount
+            self.lib.move_up(before)
+
+    def test_update_files_sorted(self):
+        """Insert new files where the sort mode puts them."""
+        before = os.getcwd()
+        settings = self.vimiv.settings["GENERAL"]
+        with tempfile.TemporaryDirectory(prefix="vimivtests-") as directory:
+            for name, mtime in [("a.png", 300), ("b.png", 100),
+                                ("c.png", 200)]:
+                shutil.copyfile(os.path.join(before, "arch-logo.png"),
+                                os.path.join(directory, name))
+                os.utime(os.path.join(directory, name), (mtime, mtime))
+            os.rename(os.path.join(directory, "c.png"),
+                      os.path.join(directory, ".c.png"))
+            settings["sort"] = "mtime"
+            self.lib.move_up(directory)
+            self.assertEqual(self.lib.files, ["b.png", "a.png"])
+            os.rename(".c.png", "c.png")
+            self.lib.update_files([], ["c.png"], [])
+            self.assertEqual(self.lib.files, ["b.png", "c.png", "a.png"])
+            settings["sort"] = "name"
+            self.lib.move_up(before)
+
     def test_move_up(self):
         """Move up into directory."""
         before = os.getcwd()
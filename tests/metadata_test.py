@@ -0,0 +1,83 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Test metadata.py for vimiv's test suite."""
+
+import os
+import tempfile
+import time
+from unittest import TestCase, main
+
+from gi import require_version
+require_version("Gtk", "3.0")
+from gi.repository import GLib
+from PIL import Image
+
+from vimiv import metadata
+
+
+class MetadataTest(TestCase):
+    """Metadata index Tests."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory(prefix="vimivtests-")
+        metadata.connect(os.path.join(cls.tmpdir.name, "metadata.db"))
+        cls.path = os.path.join(cls.tmpdir.name, "image.jpg")
+        exif = Image.Exif()
+        exif[272] = "Camera"
+        exif[274] = 6
+        exif[306] = "2016:01:02 03:04:05"
+        Image.new("RGB", (123, 45)).save(cls.path, exif=exif)
+
+    def setUp(self):
+        metadata.clear()
+
+    def test_read(self):
+        """Read the metadata of an image."""
+        data = metadata.get_metadata(self.path)
+        self.assertEqual((data.width, data.height), (123, 45))
+        self.assertEqual(data.format, "jpeg")
+        self.assertEqual(data.orientation, 6)
+        self.assertEqual(data.date, "2016:01:02 03:04:05")
+        self.assertEqual(data.camera, "Camera")
+        self.assertEqual(data.size, os.path.getsize(self.path))
+
+    def test_no_image(self):
+        """Return None for files which are no images."""
+        path = os.path.join(self.tmpdir.name, "text.jpg")
+        with open(path, "w") as f:
+            f.write("no image")
+        self.assertIsNone(metadata.get_metadata(path))
+        self.assertIsNone(metadata.get_metadata(path + "_missing"))
+
+    def test_persistent(self):
+        """Look metadata up in the database after restarting."""
+        data = metadata.get_metadata(self.path)
+        metadata.connect(os.path.join(self.tmpdir.name, "metadata.db"))
+        # The file is not read again
+        real_read = metadata._read
+        metadata._read = None
+        try:
+            self.assertEqual(metadata.get_metadata(self.path), data)
+        finally:
+            metadata._read = real_read
+
+    def test_index_async_error(self):
+        """Call the error callback if indexing fails."""
+        errors = []
+        metadata.index_async([None], self.fail, error_callback=errors.append)
+        context = GLib.MainContext.default()
+        for _ in range(100):
+            if errors:
+                break
+            context.iteration(False)
+            time.sleep(0.01)
+        self.assertIsInstance(errors[0], TypeError)
+
+    @classmethod
+    def tearDownClass(cls):
+        metadata.close()
+        cls.tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@
 import os
 from unittest import main
 
-from vimiv_testcase import VimivTestCase
+from vimiv_testcase import VimivTestCase, refresh_gui
 
 
 class OpeningTest(VimivTestCase):
@@ -64,7 +64,38 @@ class OpeningTest(VimivTestCase):
         working_dir = self.working_directory
         os.chdir("vimiv/testimages")
         self.init_test(["."], ["GENERAL"], ["recursive"], [True])
+        # Directories are searched in the background
+        for _ in range(100):
+            if not self.vimiv.walker.running:
+                break
+            refresh_gui(0.05)
         self.assertEqual(8, len(self.vimiv.paths))
+        self.assertEqual(self.vimiv.paths, sorted(self.vimiv.paths))
+        self.working_directory = working_dir
+
+    def test_appending_while_scanning(self):
+        """Append paths while scanning and sort them once finished."""
+        working_dir = self.working_directory
+        os.chdir("vimiv/testimages")
+        self.init_test()
+        self.vimiv.scan([os.getcwd()])
+        # Results of the walker are dropped, batches are added by hand
+        self.vimiv.walker.stop()
+        self.vimiv.append_paths([os.path.abspath("vimiv.bmp")])
+        self.assertEqual(self.vimiv.index, 0)
+        self.assertTrue(self.vimiv.scanning)
+        statusbar_text = self.vimiv["statusbar"].left_label.get_text()
+        self.assertTrue(statusbar_text.startswith("1/… scanning  vimiv.bmp"))
+        self.vimiv.append_paths([os.path.abspath("arch-logo.png"),
+                                 os.path.abspath("arch_001.jpg")])
+        self.vimiv["image"].move_index(delta=2)
+        self.vimiv.finish_scanning()
+        self.assertFalse(self.vimiv.scanning)
+        # Order changed but the current image is kept
+        expected_images = [os.path.abspath(image) for image in
+                           ["arch-logo.png", "arch_001.jpg", "vimiv.bmp"]]
+        self.assertEqual(self.vimiv.paths, expected_images)
+        self.assertEqual(self.vimiv.index, 1)
         self.working_directory = working_dir
 
     def tearDown(self):
@@ -0,0 +1,69 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Test perf.py for vimiv's test suite."""
+
+import json
+from unittest import main
+
+from vimiv_testcase import VimivTestCase
+
+from vimiv.perf import percentile
+
+
+class PerfTest(VimivTestCase):
+    """Render timing Tests."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.init_test(cls, ["vimiv/testimages/arch_001.jpg"])
+        cls.perf = cls.vimiv["perf"]
+
+    def test_percentile(self):
+        """Calculate percentiles using the nearest rank."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 51)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([3], 95), 3)
+
+    def test_record_stages(self):
+        """Record the stages of displaying an image."""
+        self.vimiv["image"].move_index()
+        stats = self.perf.get_stats()
+        for stage in ["stat", "decode", "scale", "set_from_pixbuf"]:
+            self.assertIn(stage, stats)
+        decode = [record for record in self.perf.records
+                  if record["stage"] == "decode"][-1]
+        self.assertEqual(decode["format"], "jpeg")
+        count, p50, p95 = stats["decode"]
+        self.assertGreater(count, 0)
+        self.assertLessEqual(p50, p95)
+
+    def test_ring_buffer(self):
+        """Only keep the latest records."""
+        for i in range(self.perf.records.maxlen + 10):
+            with self.perf.measure("test", index=i):
+                pass
+        self.assertEqual(len(self.perf.records), self.perf.records.maxlen)
+        self.assertEqual(self.perf.records[-1]["index"],
+                         self.perf.records.maxlen + 9)
+        self.perf.records.clear()
+
+    def test_show_and_dump(self):
+        """Show timings in the statusbar and dump them to the log."""
+        self.perf.records.clear()
+        self.run_command("perf")
+        self.check_statusbar("INFO: No timings recorded")
+        with self.perf.measure("decode", format="png"):
+            pass
+        self.run_command("perf")
+        self.assertIn("decode", self.vimiv["statusbar"].left_label.get_text())
+        self.run_command("perf_dump")
+        with open(self.vimiv["log"].filename) as f:
+            last_line = f.readlines()[-1]
+        self.assertTrue(last_line.startswith("[perf]"))
+        record = json.loads(last_line[16:])
+        self.assertEqual(record["stage"], "decode")
+        self.assertEqual(record["format"], "png")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Test pyramid.py for vimiv's test suite."""
+
+import os
+import tempfile
+import time
+from unittest import TestCase, main
+
+from gi import require_version
+require_version("Gtk", "3.0")
+from gi.repository import GdkPixbuf
+
+from vimiv.pyramid import ImagePyramid, clean_cache
+
+
+class PyramidTest(TestCase):
+    """ImagePyramid Tests."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.path = os.path.abspath("vimiv/testimages/arch_001.jpg")
+        info = GdkPixbuf.Pixbuf.get_file_info(cls.path)
+        cls.width, cls.height = info[1:]
+
+    def setUp(self):
+        self.pyramid = ImagePyramid(self.path, self.width, self.height)
+
+    def test_levels(self):
+        """Select the correct level depending on zoom."""
+        self.assertEqual(self.pyramid.get_level(1), 0)
+        self.assertEqual(self.pyramid.get_level(2), 0)
+        self.assertEqual(self.pyramid.get_level(0.5), 1)
+        self.assertEqual(self.pyramid.get_level(0.3), 1)
+        self.assertEqual(self.pyramid.get_level(0.25), 2)
+        # Never coarser than the coarsest level
+        self.assertEqual(self.pyramid.get_level(0.0001),
+                         self.pyramid.max_level)
+
+    def test_get_pixbuf(self):
+        """Load levels lazily and release finer ones."""
+        self.assertFalse(self.pyramid.levels)
+        pixbuf = self.pyramid.get_pixbuf(0.5)
+        self.assertEqual(pixbuf.get_width(), self.width // 2)
+        self.assertEqual(list(self.pyramid.levels), [1])
+        # Level was cached on disk in the background
+        # pylint: disable=protected-access
+        ImagePyramid._pool.apply(time.sleep, (0,))
+        self.assertTrue(os.path.isfile(self.pyramid._get_cache_path(1)))
+        pixbuf = self.pyramid.get_pixbuf(0.25)
+        self.assertEqual(pixbuf.get_width(), self.width // 4)
+        self.assertEqual(list(self.pyramid.levels), [2])
+
+    def test_rotate(self):
+        """Rotate loaded and newly loaded levels."""
+        self.pyramid.get_pixbuf(0.5)
+        self.pyramid.rotate(1)
+        self.assertEqual(self.pyramid.width, self.height)
+        self.assertEqual(self.pyramid.get_pixbuf(0.5).get_width(),
+                         self.height // 2)
+        self.assertEqual(self.pyramid.get_pixbuf(0.25).get_width(),
+                         self.height // 4)
+
+    def test_clean_cache(self):
+        """Remove the least recently used levels once the cache is full."""
+        with tempfile.TemporaryDirectory(prefix="vimivtests-") as directory:
+            for i in range(3):
+                path = os.path.join(directory, "level_%d.png" % (i))
+                with open(path, "wb") as f:
+                    f.write(bytes(100))
+                os.utime(path, (i, i))
+            # Files being written are kept
+            open(os.path.join(directory, "tmp"), "w").close()
+            clean_cache(directory, 250)
+            self.assertEqual(sorted(os.listdir(directory)),
+                             ["level_1.png", "level_2.png", "tmp"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Test sorting.py for vimiv's test suite."""
+
+import os
+import tempfile
+import time
+from unittest import TestCase, main
+
+from gi import require_version
+require_version("Gtk", "3.0")
+from gi.repository import GLib
+from PIL import Image
+
+from vimiv import metadata
+from vimiv.sorting import forget, insert_paths, natural_key, sort_paths
+
+
+class SortingTest(TestCase):
+    """Sorting Tests."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory(prefix="vimivtests-")
+        metadata.connect(os.path.join(cls.tmpdir.name, "metadata.db"))
+        # Name, size, mtime and capture date all give a different order
+        cls.paths = []
+        images = [("image10.jpg", (30, 30), 100, "2016:01:01 00:00:00"),
+                  ("image2.jpg", (10, 10), 300, "2017:01:01 00:00:00"),
+                  ("image1.jpg", (20, 20), 200, "2015:01:01 00:00:00")]
+        for name, size, mtime, date in images:
+            path = os.path.join(cls.tmpdir.name, name)
+            exif = Image.Exif()
+            exif[306] = date
+            Image.new("RGB", size).save(path, exif=exif)
+            os.utime(path, (mtime, mtime))
+            cls.paths.append(path)
+        # Sorting only uses metadata the indexer already read
+        metadata.get_metadata_many(cls.paths)
+
+    def names(self, mode):
+        """Return the sorted basenames of the test images."""
+        return [os.path.basename(path)
+                for path in sort_paths(self.paths, mode)]
+
+    def test_natural_key(self):
+        """Compare numbers in names by value."""
+        self.assertLess(natural_key("image2.jpg"), natural_key("image10.jpg"))
+        self.assertLess(natural_key("A1"), natural_key("b1"))
+
+    def test_sort_modes(self):
+        """Sort paths with the different modes."""
+        self.assertEqual(self.names("name"),
+                         ["image1.jpg", "image10.jpg", "image2.jpg"])
+        self.assertEqual(self.names("natural"),
+                         ["image1.jpg", "image2.jpg", "image10.jpg"])
+        self.assertEqual(self.names("mtime"),
+                         ["image10.jpg", "image1.jpg", "image2.jpg"])
+        self.assertEqual(self.names("dimensions"),
+                         ["image2.jpg", "image1.jpg", "image10.jpg"])
+        self.assertEqual(self.names("date"),
+                         ["image1.jpg", "image10.jpg", "image2.jpg"])
+        with self.assertRaises(ValueError):
+            sort_paths(self.paths, "unknown")
+
+    def test_sort_unindexed(self):
+        """Sort unindexed paths by name and call back once they are indexed."""
+        path = os.path.join(self.tmpdir.name, "image0.jpg")
+        Image.new("RGB", (50, 50)).save(path)
+        paths = self.paths + [path]
+        calls = []
+        self.assertEqual(sort_paths(paths, "dimensions", calls.append, 1)[0],
+                         path)
+        context = GLib.MainContext.default()
+        for _ in range(100):
+            if calls:
+                break
+            context.iteration(False)
+            time.sleep(0.01)
+        self.assertEqual(calls, [1])
+        self.assertEqual(sort_paths(paths, "dimensions")[-1], path)
+        os.remove(path)
+
+    def test_sort_speed(self):
+        """Re-sort large lists quickly using the cached keys."""
+        paths = ["/nonexistent/image%d.jpg" % (i)
+                 for i in range(50000, 0, -1)]
+        sort_paths(paths, "natural")
+        start = time.time()
+        sorted_paths = sort_paths(paths, "natural")
+        self.assertLess(time.time() - start, 0.1)
+        self.assertEqual(sorted_paths, list(reversed(paths)))
+
+    def test_sort_speed_mtime(self):
+        """Re-sort large lists of files by mtime without stat'ing them."""
+        with tempfile.TemporaryDirectory(prefix="vimivtests-") as directory:
+            paths = []
+            for i in range(50000):
+                path = os.path.join(directory, "image%d.jpg" % (i))
+                open(path, "w").close()
+                os.utime(path, (50000 - i, 50000 - i))
+                paths.append(path)
+            sort_paths(paths, "mtime")
+            start = time.time()
+            sorted_paths = sort_paths(paths, "mtime")
+            self.assertLess(time.time() - start, 0.1)
+            self.assertEqual(sorted_paths, list(reversed(paths)))
+            # Changed files are stat'ed again once forgotten
+            os.utime(paths[-1], (100000, 100000))
+            forget([paths[-1]])
+            self.assertEqual(sort_paths(paths, "mtime")[-1], paths[-1])
+
+    def test_insert_paths(self):
+        """Insert paths into sorted lists and append them to other lists."""
+        paths = ["image1.jpg", "image3.jpg"]
+        self.assertEqual(insert_paths(paths, ["image2.jpg"], "natural"),
+                         ["image1.jpg", "image2.jpg", "image3.jpg"])
+        self.assertEqual(insert_paths(paths[::-1], ["image2.jpg"], "natural"),
+                         ["image3.jpg", "image1.jpg", "image2.jpg"])
+
+    @classmethod
+    def tearDownClass(cls):
+        metadata.close()
+        cls.tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 # vim: ft=python fileencoding=utf-8 sw=4 et sts=4
 """Statusbar tests for vimiv's test suite."""
 
+import os
+import shutil
+import tempfile
 from unittest import main
 
-from vimiv_testcase import VimivTestCase
+from vimiv_testcase import VimivTestCase, refresh_gui
 
 
 class StatusbarTest(VimivTestCase):
@@ -44,6 +47,18 @@ class StatusbarTest(VimivTestCase):
         self.assertNotEqual(self.statusbar.left_label.get_text(),
                             "INFO: Test info")
 
+    def test_dimensions(self):
+        """Show the dimensions once the image was indexed in the background."""
+        with tempfile.TemporaryDirectory(prefix="vimivtests-") as directory:
+            path = os.path.join(directory, "image.jpg")
+            shutil.copyfile("vimiv/testimages/arch_001.jpg", path)
+            self.assertEqual(self.statusbar.get_dimensions(path), "")
+            self.assertIn(path, self.statusbar.indexing)
+            while self.statusbar.indexing:
+                refresh_gui(0.01)
+            self.assertRegex(self.statusbar.get_dimensions(path),
+                             r"^\d+x\d+  $")
+
     def test_hidden_message(self):
         """Show an error message with an initially hidden statusbar."""
         # Hide
@@ -51,6 +51,17 @@ class ThumbnailManagerTest(TestCase):
         # A file that does not exist
         self.assertFalse(self.thumb_store.get_thumbnail("bla"))
 
+    def test_get_thumbnail_without_creating(self):
+        """Only get the filename of existing thumbnails."""
+        new_dir = tempfile.TemporaryDirectory(prefix="vimivtests-")
+        new_file = os.path.join(new_dir.name, "test.png")
+        shutil.copyfile("vimiv/testimages/arch-logo.png", new_file)
+        self.assertIsNone(self.thumb_store.get_thumbnail(new_file, False))
+        thumbnail = self.thumb_store.get_thumbnail(new_file)
+        self.assertEqual(self.thumb_store.get_thumbnail(new_file, False),
+                         thumbnail)
+        new_dir.cleanup()
+
 
 if __name__ == "__main__":
     main()
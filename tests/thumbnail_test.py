@@ -42,6 +42,17 @@ class ThumbnailTest(VimivTestCase):
         self.assertFalse(self.thumb.toggled)
         self.assertFalse(self.thumb.iconview.is_focus())
 
+    def test_release_image(self):
+        """Release the image in thumbnail mode and restore it afterwards."""
+        image = self.vimiv["image"]
+        self.assertTrue(image.released)
+        self.assertIsNone(image.image.get_pixbuf())
+        self.thumb.toggle()
+        refresh_gui()
+        self.assertFalse(image.released)
+        self.assertIsNotNone(image.image.get_pixbuf())
+        self.thumb.toggle()
+
     def test_iconview_clicked(self):
         """Select thumbnail."""
         path = Gtk.TreePath([1])
@@ -69,6 +80,26 @@ class ThumbnailTest(VimivTestCase):
         name = self.thumb.liststore.get_value(new_liststore_iter, 1)
         self.assertEqual(name, "arch-logo [*]")
 
+    def test_update(self):
+        """Only create thumbnails of changed rows."""
+        refresh_gui(0.5)
+        pixbufs = [row[0] for row in self.thumb.liststore]
+        requested = []
+        request = self.thumb._request
+        self.thumb._request = lambda path, *args, **kwargs: \
+            requested.append(path) or request(path, *args, **kwargs)
+        try:
+            self.vimiv.paths.insert(1, self.vimiv.paths[0])
+            self.thumb.update([], [1], [])
+            self.assertEqual(requested, [self.vimiv.paths[1]])
+            self.assertIs(self.thumb.liststore[2][0], pixbufs[1])
+            del self.vimiv.paths[1]
+            self.thumb.update([1], [], [])
+            self.assertEqual(len(requested), 1)
+            self.assertIs(self.thumb.liststore[1][0], pixbufs[1])
+        finally:
+            self.thumb._request = request
+
     def test_move(self):
         """Move in thumbnail mode."""
         # All items are in the same row
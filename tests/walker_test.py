@@ -0,0 +1,98 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Test walker.py for vimiv's test suite."""
+
+import io
+import os
+import tempfile
+from unittest import TestCase, main
+
+from PIL import Image
+
+from vimiv.walker import LineWalker, RecursiveWalker
+from vimiv_testcase import refresh_gui
+
+
+class WalkerTest(TestCase):
+    """RecursiveWalker Tests."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory(prefix="vimiv-tests-")
+        cls.images = []
+        for directory in ["", "a", "a/b", "c"]:
+            directory = os.path.join(cls.tmpdir.name, directory)
+            os.makedirs(directory, exist_ok=True)
+            for name in ["1.png", "2.png"]:
+                path = os.path.join(directory, name)
+                Image.new("RGB", (10, 10)).save(path)
+                cls.images.append(path)
+            with open(os.path.join(directory, "text.png"), "w") as f:
+                f.write("not an image")
+        # Symbolic links to directories are not followed
+        os.symlink(os.path.join(cls.tmpdir.name, "a"),
+                   os.path.join(cls.tmpdir.name, "link"))
+
+    def setUp(self):
+        self.batches = []
+        self.finished = False
+
+    def _walk(self, walker, source=None):
+        if source is None:
+            source = [self.tmpdir.name]
+        walker.walk(source, self.batches.append, self._finish)
+        for _ in range(100):
+            if self.finished:
+                break
+            refresh_gui(0.01)
+        self.assertTrue(self.finished)
+        self.assertFalse(walker.running)
+
+    def _finish(self):
+        self.finished = True
+
+    def test_walk(self):
+        """Find all images in batches of one directory."""
+        self._walk(RecursiveWalker())
+        self.assertEqual(len(self.batches), 4)
+        for batch in self.batches:
+            self.assertEqual(batch, sorted(batch))
+        found = [path for batch in self.batches for path in batch]
+        self.assertEqual(sorted(found), sorted(self.images))
+
+    def test_trust_extensions(self):
+        """Trust image extensions once check_amount files were checked."""
+        walker = RecursiveWalker(0)
+        self._walk(walker)
+        found = [path for batch in self.batches for path in batch]
+        self.assertEqual(len(found), 12)
+        self.assertEqual(walker.checked, 12)
+
+    def test_stop(self):
+        """Drop all results after stopping."""
+        walker = RecursiveWalker()
+        walker.walk([self.tmpdir.name], self.batches.append, self._finish)
+        walker.stop()
+        refresh_gui(0.1)
+        self.assertEqual(self.batches, [])
+        self.assertFalse(self.finished)
+
+    def test_read_lines(self):
+        """Read images from a stream keeping their order."""
+        paths = list(reversed(self.images))
+        lines = paths[:3] + [os.path.join(self.tmpdir.name, "text.png"),
+                             os.path.join(self.tmpdir.name, "nope.png")] \
+            + paths[3:]
+        stream = io.StringIO("".join(line + "\n" for line in lines))
+        self._walk(LineWalker(), stream)
+        # The first image is reported on its own
+        self.assertEqual(self.batches[0], paths[:1])
+        found = [path for batch in self.batches for path in batch]
+        self.assertEqual(found, paths)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Test watcher.py for vimiv's test suite."""
+
+import os
+import shutil
+import tempfile
+from unittest import main
+
+from vimiv_testcase import VimivTestCase, refresh_gui
+
+
+class WatcherTest(VimivTestCase):
+    """Directory Watcher Tests."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory(prefix="vimiv-tests-")
+        for image in ["arch_001.jpg", "arch-logo.png", "vimiv.bmp"]:
+            shutil.copy(os.path.join("vimiv/testimages", image),
+                        cls.tmpdir.name)
+        cls.init_test(cls, [os.path.join(cls.tmpdir.name, "arch_001.jpg")])
+        cls.watcher = cls.vimiv["watcher"]
+        cls.watcher.update_monitors()
+
+    def wait_for(self, condition):
+        """Wait until the watcher applied changes fulfilling condition."""
+        for _ in range(100):
+            refresh_gui(0.02)
+            if condition():
+                return
+        self.fail("Changes were not applied")
+
+    def test_watch_directories(self):
+        """Watch the directory of the library and of the images."""
+        self.assertIn(self.tmpdir.name, self.watcher.monitors)
+        self.assertIn(os.getcwd(), self.watcher.monitors)
+
+    def test_apply_changes(self):
+        """Add and remove images changed outside of vimiv."""
+        new_image = os.path.join(self.tmpdir.name, "arch_002.jpg")
+        shutil.copyfile(os.path.join(self.tmpdir.name, "arch_001.jpg"),
+                        new_image)
+        self.wait_for(lambda: new_image in self.vimiv.paths)
+        self.assertIn("arch_002.jpg", self.vimiv["library"].files)
+        os.remove(new_image)
+        self.wait_for(lambda: new_image not in self.vimiv.paths)
+        self.assertNotIn("arch_002.jpg", self.vimiv["library"].files)
+
+    def test_keep_file_list(self):
+        """Do not add new images to a list of files given explicitly."""
+        paths = self.vimiv.paths
+        self.vimiv.paths = [os.path.join(self.tmpdir.name, image)
+                            for image in ["arch_001.jpg", "vimiv.bmp"]]
+        new_image = os.path.join(self.tmpdir.name, "arch_003.jpg")
+        shutil.copyfile(os.path.join(self.tmpdir.name, "arch_001.jpg"),
+                        new_image)
+        self.wait_for(
+            lambda: "arch_003.jpg" in self.vimiv["library"].files)
+        self.assertNotIn(new_image, self.vimiv.paths)
+        os.remove(new_image)
+        self.wait_for(
+            lambda: "arch_003.jpg" not in self.vimiv["library"].files)
+        self.vimiv.paths = self.vimiv.directory_paths = paths
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.watcher.stop()
+        cls.vimiv.quit()
+        os.chdir(cls.working_directory)
+        cls.tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -42,6 +42,8 @@ class WindowTest(VimivTestCase):
         self.vimiv["window"].resize(400, 300)
         refresh_gui()
         self.assertEqual(self.vimiv["window"].winsize, (400, 300))
+        # Re-layout happened once the resize events were handled
+        self.assertFalse(self.vimiv["window"].relayout_id)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,291 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Decode animations in a worker thread.
+
+Frames are taken from a frame source, scaled to the current zoom level and
+stored in a bounded frame cache. If all frames fit into the cache, they are
+decoded once and replayed from memory. Otherwise the worker decodes a few
+frames ahead of playback and releases frames once they have been shown.
+
+A frame source provides the attributes width, height and n_frames (None if
+unknown) and the methods restart(), close() and next_frame(), the latter
+returning a tuple of (pixbuf, delay) where delay is in ms and negative for
+static images. GdkPixbuf only animates gifs, other animated formats such as
+WebP and APNG are read frame by frame using PIL.
+"""
+
+from threading import Condition, Thread
+
+from gi._error import GError
+from gi.repository import GdkPixbuf, GLib
+from PIL import Image, ImageSequence
+
+
+def _count_frames(path):
+    """Return the amount of frames in path or None if it cannot be read."""
+    try:
+        with Image.open(path) as im:
+            return getattr(im, "n_frames", 1)
+    except (IOError, ValueError):
+        return None
+
+
+class PixbufFrameSource:
+    """Sequential frames of an animation loaded by GdkPixbuf.
+
+    Attributes:
+        animation: The GdkPixbuf.PixbufAnimation.
+        width: Width of the animation.
+        height: Height of the animation.
+        n_frames: Amount of frames of one loop, None if unknown.
+    """
+
+    def __init__(self, path):
+        self.animation = GdkPixbuf.PixbufAnimation.new_from_file(path)
+        self.width = self.animation.get_width()
+        self.height = self.animation.get_height()
+        self.n_frames = _count_frames(path)
+        self._time = GLib.TimeVal()
+        self._iter = None
+        self.restart()
+
+    def restart(self):
+        """Start again at the first frame."""
+        self._time = GLib.TimeVal()
+        self._iter = self.animation.get_iter(self._time)
+
+    def next_frame(self):
+        """Return the next frame as tuple of (pixbuf, delay)."""
+        # The iter re-uses its pixbuf for the following frames
+        pixbuf = self._iter.get_pixbuf().copy()
+        delay = self._iter.get_delay_time()
+        if delay >= 0:
+            self._time.add(delay * 1000)
+            self._iter.advance(self._time)
+        return pixbuf, delay
+
+    def close(self):
+        """Release the animation."""
+        self.animation = None
+
+
+class PILFrameSource:
+    """Sequential frames of an animation loaded by PIL.
+
+    Frames are only decoded when they are requested so the file is never
+    completely resident in memory.
+
+    Attributes:
+        image: The opened PIL image.
+        width: Width of the animation.
+        height: Height of the animation.
+        n_frames: Amount of frames of one loop.
+    """
+
+    def __init__(self, path):
+        self.image = Image.open(path)
+        self.width, self.height = self.image.size
+        self.n_frames = getattr(self.image, "n_frames", 1)
+        self._frames = None
+        self.restart()
+
+    def restart(self):
+        """Start again at the first frame."""
+        self._frames = iter(ImageSequence.Iterator(self.image))
+
+    def next_frame(self):
+        """Return the next frame as tuple of (pixbuf, delay)."""
+        frame = next(self._frames).convert("RGBA")
+        # Do not animate static images
+        delay = frame.info.get("duration", 100) if self.n_frames > 1 else -1
+        pixbuf = GdkPixbuf.Pixbuf.new_from_bytes(
+            GLib.Bytes.new(frame.tobytes()), GdkPixbuf.Colorspace.RGB, True,
+            8, self.width, self.height, 4 * self.width)
+        return pixbuf, int(delay)
+
+    def close(self):
+        """Close the file of the image."""
+        self.image.close()
+
+
+def get_frame_source(path, info):
+    """Return the frame source fitting the format of path.
+
+    Args:
+        path: Path to the animation.
+        info: FormatInfo of path.
+    """
+    if "gif" in info.extensions:
+        return PixbufFrameSource(path)
+    return PILFrameSource(path)
+
+
+class Animation:
+    """Frames of an animation decoded and scaled in a worker thread.
+
+    Attributes:
+        source: The frame source to decode.
+        width: Width of the animation.
+        height: Height of the animation.
+        zoom: Zoom percentage to which frames are scaled.
+        max_bytes: Maximum size of the frame cache. Animations with larger
+            frames are streamed.
+        lookahead: Amount of frames decoded ahead of playback when streaming.
+        position: Index of the frame shown next.
+        frames: Dictionary of decoded frames, frames[index] = (pixbuf, delay).
+        current: Frame which was shown last as tuple (pixbuf, delay).
+        shown: Index of the frame which was shown last.
+        error_callback: Callable of form error_callback(exception) called from
+            the main loop if a frame could not be decoded.
+    """
+
+    def __init__(self, source, zoom=1, max_bytes=256 * 2**20, lookahead=8,
+                 error_callback=None):
+        """Start decoding frames of source.
+
+        Args:
+            source: The frame source to decode.
+            zoom: Zoom percentage to which frames are scaled.
+            max_bytes: Maximum size of the frame cache.
+            lookahead: Amount of frames decoded ahead when streaming.
+            error_callback: Called if a frame could not be decoded.
+        """
+        self.source = source
+        self.width = source.width
+        self.height = source.height
+        self.zoom = zoom
+        self.max_bytes = max_bytes
+        self.lookahead = lookahead
+        self.position = 0
+        self.frames = {}
+        self.current = None
+        self.shown = 0
+        self.error_callback = error_callback
+        self._condition = Condition()
+        self._generation = 0
+        self._stopped = False
+        self._source_position = 0
+        Thread(target=self._decode, daemon=True).start()
+
+    @property
+    def stopped(self):
+        """True once no more frames are decoded."""
+        return self._stopped
+
+    def is_cached(self):
+        """Return True if all frames fit into the frame cache."""
+        if not self.source.n_frames:
+            return False
+        width, height = self.get_scaled_size()
+        return self.source.n_frames * width * height * 4 <= self.max_bytes
+
+    def get_scaled_size(self):
+        """Return the size of frames at the current zoom as tuple."""
+        return (max(1, int(self.width * self.zoom)),
+                max(1, int(self.height * self.zoom)))
+
+    def get_frame(self):
+        """Return the next frame and move on.
+
+        Return:
+            Tuple of (pixbuf, delay) or None if it is not decoded yet.
+        """
+        with self._condition:
+            frame = self.frames.get(self.position)
+            if frame is None:
+                return None
+            if not self.is_cached():
+                del self.frames[self.position]
+            self.shown = self.position
+            self.position = self._next(self.position)
+            self.current = frame
+            self._condition.notify_all()
+        return frame
+
+    def set_zoom(self, zoom):
+        """Scale all following frames to zoom.
+
+        Playback continues with the frame shown last so it can be replaced by
+        its rescaled version.
+        """
+        with self._condition:
+            if zoom == self.zoom:
+                return
+            self.zoom = zoom
+            self.frames.clear()
+            if self.current is not None:
+                self.position = self.shown
+            self._generation += 1
+            self._condition.notify_all()
+
+    def stop(self):
+        """Stop the worker thread."""
+        with self._condition:
+            self._stopped = True
+            self.frames.clear()
+            self._condition.notify_all()
+
+    def _next(self, index):
+        index += 1
+        if self.source.n_frames:
+            index %= self.source.n_frames
+        return index
+
+    def _needs_frames(self):
+        if self.is_cached():
+            return len(self.frames) < self.source.n_frames
+        if self.source.n_frames:
+            return len(self.frames) < min(self.lookahead,
+                                          self.source.n_frames)
+        return len(self.frames) < self.lookahead
+
+    def _decode(self):
+        generation = -1
+        index = 0
+        while True:
+            with self._condition:
+                while not self._stopped and not self._needs_frames():
+                    self._condition.wait()
+                if self._stopped:
+                    self.source.close()
+                    return
+                # Zoom changed, continue at the current position
+                if generation != self._generation:
+                    generation = self._generation
+                    index = self.position
+                zoom = self.zoom
+            try:
+                pixbuf, delay = self._read_frame(index)
+            except (GError, IOError, EOFError, StopIteration) as e:
+                if self.error_callback is not None:
+                    GLib.idle_add(self.error_callback, e)
+                # Keep playing the frames which were decoded so far
+                if index:
+                    with self._condition:
+                        self.source.n_frames = index
+                        self.position %= index
+                        self.shown %= index
+                    index = 0
+                    continue
+                self.stop()
+                self.source.close()
+                return
+            if zoom != 1:
+                pixbuf = pixbuf.scale_simple(
+                    max(1, int(self.width * zoom)),
+                    max(1, int(self.height * zoom)),
+                    GdkPixbuf.InterpType.BILINEAR)
+            with self._condition:
+                if generation == self._generation and not self._stopped:
+                    self.frames[index] = (pixbuf, delay)
+                    index = self._next(index)
+
+    def _read_frame(self, index):
+        # Sources can only be read sequentially
+        if index < self._source_position:
+            self.source.restart()
+            self._source_position = 0
+        while self._source_position < index:
+            self.source.next_frame()
+            self._source_position += 1
+        self._source_position += 1
+        return self.source.next_frame()
@@ -4,6 +4,7 @@
 import os
 import sys
 import tempfile
+from random import shuffle
 from time import time
 from typing import TypeVar
 
@@ -22,10 +23,15 @@ from vimiv.library import Library
 from vimiv.log import Log
 from vimiv.manipulate import Manipulate
 from vimiv.mark import Mark
+from vimiv.metadata import index_async
+from vimiv.perf import Perf
 from vimiv.slideshow import Slideshow
+from vimiv.sorting import sort_paths
 from vimiv.statusbar import Statusbar
 from vimiv.tags import TagHandler
 from vimiv.thumbnail import Thumbnail
+from vimiv.walker import LineWalker, RecursiveWalker
+from vimiv.watcher import Watcher
 from vimiv.window import Window
 
 GenericType = TypeVar('GenericType')
@@ -49,6 +55,11 @@ class Vimiv(Gtk.Application):
         functions: Dictionary of functions. Includes all commands and additional
             functions that cannot be called from the commandline.
         screensize: Available screensize.
+        stdin: Stream to read paths from if the input comes from a pipe.
+        walker: Walker searching for images in the background.
+        directory_paths: The imagelist if it was populated from complete
+            directories, i.e. from a single path or by a recursive scan. See
+            paths_from_directory.
     """
 
     def __init__(self, running_tests=False):
@@ -73,6 +84,10 @@ class Vimiv(Gtk.Application):
         self.commands = {}
         self.aliases = {}
         self.functions = {}
+        self.stdin = None
+        self.walker = None
+        self._scanned_paths = None
+        self.directory_paths = None
         # Set up all commandline options
         self.init_commandline_options()
 
@@ -87,6 +102,8 @@ class Vimiv(Gtk.Application):
             hint: Special string for user, always empty in vimiv.
         """
         filenames = [fil.get_path() for fil in files]
+        # Paths given as arguments are preferred over the pipe
+        self.stdin = None
         # Move to the directory of the first argument
         if os.path.isdir(filenames[0]):
             working_directory = filenames[0]
@@ -94,10 +111,19 @@ class Vimiv(Gtk.Application):
             working_directory = os.path.dirname(filenames[0])
         if os.path.exists(working_directory):
             os.chdir(working_directory)
-        # Populate list of images
+        # Populate list of images, a single directory is searched recursively
+        # in the background once vimiv is activated
         recursive = self.settings["GENERAL"]["recursive"]
+        if recursive and n_files == 1 and os.path.isdir(filenames[0]):
+            self.activate_vimiv(self)
+            return
         shuffle = self.settings["GENERAL"]["shuffle"]
-        self.paths, self.index = populate(filenames, recursive, shuffle)
+        check_amount = self.settings["GENERAL"]["image_check_amount"]
+        self.paths, self.index = populate(
+            filenames, recursive, shuffle, check_amount,
+            self.settings["GENERAL"]["sort"], self.resort)
+        if n_files == 1:
+            self.directory_paths = self.paths
 
         # Activate vimiv after opening files
         self.activate_vimiv(self)
@@ -158,18 +184,12 @@ class Vimiv(Gtk.Application):
             self.settings = parse_config(running_tests=self.running_tests)
 
         # If we start from desktop, move to the wanted directory
-        # Else if the input does not come from a tty, e.g. find "" | vimiv, set
-        # paths and index according to the input from the pipe
+        # Else if the input does not come from a tty, e.g. find "" | vimiv,
+        # read paths from the pipe in the background once vimiv is activated
         if options.contains("start-from-desktop"):
             os.chdir(self.settings["LIBRARY"]["desktop_start_dir"])
         elif not sys.stdin.isatty():
-            try:
-                tty_paths = []
-                for line in sys.stdin:
-                    tty_paths.append(line.rstrip("\n"))
-                self.paths, self.index = populate(tty_paths)
-            except TypeError:
-                pass  # DebugConsoleStdIn is not iterable
+            self.stdin = sys.stdin
 
         set_option("bar", "GENERAL", "display_bar", 1)
         set_option("no-bar", "GENERAL", "display_bar", 0)
@@ -205,21 +225,16 @@ class Vimiv(Gtk.Application):
         if self[Statusbar].hidden:
             self[Statusbar].bar.hide()
         self[Statusbar].set_separator_height()
-        # Try to generate imagelist recursively from the current directory if
-        # recursive is given and not paths exist
-        if self.settings["GENERAL"]["recursive"] and not self.paths:
-            shuffle = self.settings["GENERAL"]["shuffle"]
-            self.paths, self.index = populate([os.getcwd()], True, shuffle)
+        # Read the imagelist from the pipe or generate it recursively from the
+        # current directory in the background if recursive is given and no
+        # paths exist
+        if self.stdin is not None:
+            self.read_paths(self.stdin)
+        elif self.settings["GENERAL"]["recursive"] and not self.paths:
+            self.scan([os.getcwd()])
         # Show the image if an imagelist exists
         if self.paths:
-            self[Image].load_image()
-            # Show library at the beginning?
-            if not self[Library].show_at_start:
-                self[Library].grid.hide()
-            self[Image].scrolled_win.grab_focus()
-            # Start in slideshow mode?
-            if self[Slideshow].at_start:
-                self[Slideshow].toggle()
+            self.show_first_image()
         else:
             # Slideshow without paths makes no sense
             self[Slideshow].running = False
@@ -227,6 +242,124 @@ class Vimiv(Gtk.Application):
             if self[Library].expand:
                 self[Image].scrolled_win.hide()
 
+    def show_first_image(self):
+        """Show the image at the current index when starting vimiv."""
+        index_async(self.paths)
+        self[Image].scrolled_win.show()
+        self[Image].load_image()
+        # Show library at the beginning?
+        if not self[Library].show_at_start:
+            self[Library].grid.hide()
+        self[Image].scrolled_win.grab_focus()
+        # Start in slideshow mode?
+        if self[Slideshow].at_start:
+            self[Slideshow].toggle()
+
+    def scan(self, directories):
+        """Search directories recursively and grow the imagelist meanwhile.
+
+        Args:
+            directories: List of directories to search.
+        """
+        self._start_walker(RecursiveWalker, directories)
+        self.directory_paths = self.paths
+
+    def read_paths(self, stream):
+        """Read the imagelist from stream and grow it meanwhile.
+
+        Args:
+            stream: Iterable of lines containing one path each, e.g. stdin.
+        """
+        self._start_walker(LineWalker, stream)
+
+    def _start_walker(self, walker_type, source):
+        if self.walker is not None:
+            self.walker.stop()
+        self.walker = walker_type(
+            self.settings["GENERAL"]["image_check_amount"])
+        self.paths = []
+        self._scanned_paths = self.paths
+        self.walker.walk(source, self.append_paths, self.finish_scanning)
+
+    @property
+    def scanning(self):
+        """True while the walker is still adding paths to the imagelist."""
+        return self._scanned_paths is not None \
+            and self._scanned_paths is self.paths
+
+    @property
+    def paths_from_directory(self):
+        """True if the imagelist contains all images of its directories.
+
+        New images of these directories belong to the imagelist. Lists of
+        single files, tagged images and paths read from a pipe are kept as
+        they are.
+        """
+        return self.directory_paths is not None \
+            and self.directory_paths is self.paths
+
+    def append_paths(self, paths):
+        """Append a batch of images found by the walker to the imagelist.
+
+        The first image is shown as soon as it is found. If the imagelist was
+        replaced meanwhile, e.g. by opening an image from the library, the
+        walker is stopped.
+
+        Args:
+            paths: List of paths to append.
+        """
+        if not self.scanning:
+            self.walker.stop()
+            return
+        first_batch = not self.paths
+        self.paths.extend(paths)
+        if first_batch:
+            self.index = 0
+            self.show_first_image()
+        else:
+            index_async(paths)
+            if self[Thumbnail].toggled:
+                self[Thumbnail].append(paths)
+        self[Statusbar].update_info()
+
+    def finish_scanning(self):
+        """Sort the complete imagelist keeping the current image.
+
+        Every batch was sorted by the walker so sorting only merges the
+        batches. Paths read from a stream keep their order.
+        """
+        if not self.scanning:
+            return
+        self._scanned_paths = None
+        if isinstance(self.walker, LineWalker):
+            self.stdin = None
+            # Nothing useful was piped, search recursively instead
+            if not self.paths and self.settings["GENERAL"]["recursive"]:
+                self.scan([os.getcwd()])
+                return
+        elif self.paths:
+            # Without a selected thumbnail the current image is kept
+            current = self[Thumbnail].toggled and self.get_pos(True, "thu") \
+                or self.paths[self.index]
+            if self.settings["GENERAL"]["shuffle"]:
+                shuffle(self.paths)
+            else:
+                self.paths[:] = sort_paths(self.paths,
+                                           self.settings["GENERAL"]["sort"],
+                                           self.resort)
+            self.index = self.paths.index(current)
+            if self[Thumbnail].toggled:
+                self[Thumbnail].show(toggled=True)
+        self[Statusbar].update_info()
+
+    def resort(self):
+        """Sort the imagelist again once metadata needed to sort was indexed.
+
+        Shuffled imagelists are kept.
+        """
+        if not self.settings["GENERAL"]["shuffle"]:
+            self[FileExtras].sort(self.settings["GENERAL"]["sort"])
+
     def init_widgets(self):
         """Create all the other widgets and add them to the class."""
         # pylint: disable=too-many-locals
@@ -262,6 +395,10 @@ class Vimiv(Gtk.Application):
         self["slideshow"] = slideshow
         self.register_component(slideshow)
 
+        perf = Perf(self)
+        self["perf"] = perf
+        self.register_component(perf)
+
         image = Image(self, self.settings)
         self["image"] = image
         self.register_component(image)
@@ -278,6 +415,10 @@ class Vimiv(Gtk.Application):
         self["manipulate"] = manipulate
         self.register_component(manipulate)
 
+        watcher = Watcher(self, self.settings)
+        self["watcher"] = watcher
+        self.register_component(watcher)
+
         information = Information(self)
         self["information"] = information
         self.register_component(information)
@@ -364,6 +505,7 @@ class Vimiv(Gtk.Application):
             print(image)
         # Run remaining rotate and flip threads
         self[Manipulate].thread_for_simple_manipulations()
+        self[Watcher].stop()
         # Save the history
         histfile = os.path.join(GLib.get_user_data_dir(), "vimiv", "history")
         histfile = open(histfile, "w")
@@ -250,6 +250,7 @@ class CommandLine(AppComponent):
         # List of commands without empty line
         pipe_input = pipe_input.split("\n")[:-1]
         startout = pipe_input[0]
+        check_amount = self.app.settings["GENERAL"]["image_check_amount"]
         # Do different stuff depending on the first line of pipe_input
         if os.path.isdir(startout):
             self.app["library"].move_up(startout)
@@ -261,7 +262,8 @@ class CommandLine(AppComponent):
             else:
                 old_pos = []
             # Populate filelist
-            self.app.paths, self.app.index = populate(pipe_input)
+            self.app.paths, self.app.index = populate(
+                pipe_input, check_amount=check_amount)
             if self.app.paths:  # Images were found
                 self.app["image"].scrolled_win.show()
                 self.app["image"].load_image()
@@ -270,7 +272,8 @@ class CommandLine(AppComponent):
                     self.app["library"].treeview.set_hexpand(False)
                     self.app["library"].focus(False)
             elif old_pos:  # Nothing found, go back
-                self.app.paths, self.app.index = populate(old_pos)
+                self.app.paths, self.app.index = populate(
+                    old_pos, check_amount=check_amount)
                 self.app["statusbar"].message("No image found", "info")
         else:  # Run every line as an internal command
             for cmd in pipe_input:
@@ -291,8 +294,14 @@ class CommandLine(AppComponent):
                 self.last_focused = "lib"
             else:
                 # If it is an image open it
+                check_amount = \
+                    self.app.settings["GENERAL"]["image_check_amount"]
                 self.app.paths = []
-                self.app.paths, self.app.index = populate([path])
+                self.app.paths, self.app.index = populate(
+                    [path], check_amount=check_amount,
+                    sort_mode=self.app.settings["GENERAL"]["sort"],
+                    sort_callback=self.app.resort)
+                self.app.directory_paths = self.app.paths
                 self.app["image"].load_image()
                 #  Reload library in lib mode, do not open it in image mode
                 pathdir = os.path.dirname(path)
@@ -85,6 +85,8 @@ class Commands(AppComponent):
         self.add_command("prev!", self.app["image"].move_index,
                          default_args=[False, True, 1, True],
                          supports_count=True)
+        self.add_command("perf", self.app["perf"].show)
+        self.add_command("perf_dump", self.app["perf"].dump)
         self.add_command("q", self.app.quit_wrapper)
         self.add_command("q!", self.app.quit_wrapper,
                          default_args=[True])
@@ -118,6 +120,8 @@ class Commands(AppComponent):
         self.add_command("slideshow_delay", self.app["slideshow"].set_delay,
                          default_args=[None], positional_args=["value"],
                          supports_count=True)
+        self.add_command("sort", self.app["fileextras"].sort,
+                         positional_args=["mode"])
         self.add_command("tag_load", self.app["tags"].load,
                          positional_args=["tagname"])
         self.add_command("tag_remove", self.app["tags"].remove,
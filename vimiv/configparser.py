@@ -7,6 +7,7 @@ import sys
 
 from gi.repository import GLib
 from vimiv.helpers import error_message
+from vimiv.sorting import SORT_MODES
 
 
 def set_defaults():
@@ -19,6 +20,7 @@ def set_defaults():
                "start_slideshow": False,
                "slideshow_delay": 2,
                "shuffle": False,
+               "sort": "name",
                "display_bar": True,
                "default_thumbsize": (128, 128),
                "geometry": "800x600",
@@ -26,6 +28,11 @@ def set_defaults():
                "incsearch": True,
                "recursive": False,
                "rescale_svg": True,
+               "pyramid_threshold": 100,
+               "pyramid_cache": True,
+               "decode_to_fit": True,
+               "image_check_amount": 1000,
+               "watch_directories": True,
                "overzoom": False,
                "copy_to_primary": False,
                "commandline_padding": 6,
@@ -78,9 +85,14 @@ def overwrite_section(key, config, settings):
             elif setting in ["library_width", "slideshow_delay",
                              "file_check_amount", "commandline_padding",
                              "thumb_padding", "completion_height",
-                             "border_width"]:
+                             "border_width", "pyramid_threshold",
+                             "image_check_amount"]:
                 # Must be an integer
                 file_set = int(section[setting])
+            elif setting == "sort":
+                file_set = section[setting]
+                if file_set not in SORT_MODES:
+                    raise ValueError
             elif setting == "desktop_start_dir":
                 file_set = os.path.expanduser(section[setting])
                 # Do not change the setting if the directory doesn't exist
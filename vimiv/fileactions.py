@@ -3,12 +3,14 @@
 
 import os
 from random import shuffle
+from time import time as systime
 
-from gi.repository import Gdk, GdkPixbuf, Gtk
-from PIL import Image
+from gi.repository import Gdk, GLib, Gtk
 
 from vimiv.app_component import AppComponent
-from vimiv.helpers import listdir_wrapper
+from vimiv.format_cache import get_extensions, get_format_info
+from vimiv.metadata import index_async
+from vimiv.sorting import SORT_MODES, forget, insert_paths, sort_paths
 
 
 def recursive_search(directory):
@@ -24,14 +26,44 @@ def recursive_search(directory):
             yield os.path.join(root, fil)
 
 
-def populate_single(arg, recursive):
+def list_files(directory):
+    """Return the sorted names of all files in directory which are not hidden.
+
+    The entries of os.scandir know their type so no file has to be accessed.
+    """
+    with os.scandir(directory) as entries:
+        return sorted(entry.name for entry in entries
+                      if not entry.name.startswith(".") and entry.is_file())
+
+
+def list_mtimes(directory):
+    """Return the modification times of all files in directory.
+
+    Return:
+        Dictionary of mtimes[path] = st_mtime.
+    """
+    mtimes = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file():
+                    mtimes[entry.path] = entry.stat().st_mtime
+            except OSError:
+                pass  # Removed meanwhile
+    return mtimes
+
+
+def populate_single(arg, recursive, sort_mode="name", sort_callback=None):
     """Populate a complete filelist if only one path is given.
 
     Args:
         arg: Single path given.
         recursive: If True search path recursively for images.
+        sort_mode: One of sorting.SORT_MODES.
+        sort_callback: Called once metadata needed to sort was indexed, see
+            sorting.sort_keys.
     Return:
-        Generated list of paths.
+        Generated list of paths. All of them are files.
     """
     paths = []
     if os.path.isfile(arg):
@@ -40,43 +72,54 @@ def populate_single(arg, recursive):
         if not directory:  # Default to current directory
             directory = "./"
         basename = os.path.basename(arg)
-        paths = listdir_wrapper(directory)
+        paths = sort_paths([os.path.join(directory, path)
+                            for path in list_files(directory)],
+                           sort_mode, sort_callback)
         # Set the argument to the beginning of the list
-        pos = paths.index(basename)
-        paths = [os.path.join(directory, path)
-                 for path in paths[pos:] + paths[:pos]]
+        pos = paths.index(os.path.join(directory, basename))
+        paths = paths[pos:] + paths[:pos]
     elif os.path.isdir(arg) and recursive:
-        paths = sorted(recursive_search(arg))
+        paths = sort_paths(list(recursive_search(arg)), sort_mode,
+                           sort_callback)
     return paths
 
 
-def populate(args, recursive=False, shuffle_paths=False):
+def populate(args, recursive=False, shuffle_paths=False, check_amount=-1,
+             sort_mode="name", sort_callback=None):
     """Populate a list of files out given paths.
 
     Args:
         args: Paths given.
         recursive: If True search path recursively for images.
         shuffle_paths: If True shuffle found paths randomly.
+        check_amount: Amount of files up to which the content of every file is
+            checked. In larger filelists only files with unknown extension are
+            checked. 0 to always trust extensions, -1 to check every file.
+        sort_mode: One of sorting.SORT_MODES used if a single path is given.
+        sort_callback: Called once metadata needed to sort was indexed, see
+            sorting.sort_keys.
     Return:
         Found paths, position of first given path.
     """
     paths = []
     # If only one path is passed do special stuff
-    single = None
     if len(args) == 1:
-        single = args[0]
-        args = populate_single(single, recursive)
-
-    # Add everything
-    for arg in args:
-        path = os.path.abspath(arg)
-        if os.path.isfile(path):
-            paths.append(path)
-        elif os.path.isdir(path) and recursive:
-            paths = list(recursive_search(path))
+        paths = [os.path.abspath(path)
+                 for path in populate_single(args[0], recursive, sort_mode,
+                                             sort_callback)]
+    else:
+        # Add everything
+        for arg in args:
+            path = os.path.abspath(arg)
+            if os.path.isfile(path):
+                paths.append(path)
+            elif os.path.isdir(path) and recursive:
+                paths = list(recursive_search(path))
     # Remove unsupported files
+    trust_extensions = 0 <= check_amount < len(paths)
     paths = [possible_path for possible_path in paths
-             if is_image(possible_path)]
+             if trust_extensions and has_image_extension(possible_path)
+             or is_image(possible_path)]
 
     # Shuffle
     if shuffle_paths:
@@ -91,12 +134,95 @@ def is_image(filename):
     Args:
         filename: Name of file to check.
     """
-    complete_name = os.path.abspath(os.path.expanduser(filename))
-    return bool(GdkPixbuf.Pixbuf.get_file_info(complete_name)[0])
+    return get_format_info(filename) is not None
+
+
+def has_image_extension(filename):
+    """Check whether the extension of a file belongs to an image format.
+
+    Args:
+        filename: Name of file to check.
+    """
+    return os.path.splitext(filename)[1].lower() in get_extensions()
+
+
+def plan_format(paths, string, metadata):
+    """Plan renaming paths according to a formatstring without renaming.
+
+    Args:
+        paths: List of paths to rename.
+        string: Formatstring to use, see FileExtras.format_files.
+        metadata: Dictionary of metadata[path] = Metadata from the index. Only
+            needed if string contains exif directives.
+    Return:
+        List of (source, target) tuples to rename in this order. Files that
+        are renamed to the name of another file of paths are moved to a
+        temporary name first.
+    Raise:
+        ValueError with a message if the plan would lose any file.
+    """
+    targets = []
+    for i, fil in enumerate(paths):
+        outstring = string
+        if "%" in string:
+            data = metadata.get(fil)
+            try:
+                date, time = data.date.split()
+                date = date.split(":")
+                time = time.split(":")
+                outstring = outstring.replace("%Y", date[0])  # year
+                outstring = outstring.replace("%m", date[1])  # month
+                outstring = outstring.replace("%d", date[2])  # day
+                outstring = outstring.replace("%H", time[0])  # hour
+                outstring = outstring.replace("%M", time[1])  # minute
+                outstring = outstring.replace("%S", time[2])  # second
+            except (AttributeError, IndexError, ValueError):
+                raise ValueError("No exif data for %s available" % (fil))
+        # Ending
+        outstring += "%03d" % (i + 1) + os.path.splitext(fil)[1]
+        targets.append(os.path.abspath(outstring))
+    # Collision detection
+    sources = set(os.path.abspath(fil) for fil in paths)
+    seen = set()
+    for target in targets:
+        if target in seen:
+            raise ValueError("Formatting would rename several files to %s"
+                             % (target))
+        seen.add(target)
+        if target not in sources and os.path.lexists(target):
+            raise ValueError("Formatting would overwrite %s" % (target))
+    renames = []
+    moved = []
+    for i, (fil, target) in enumerate(zip(paths, targets)):
+        source = os.path.abspath(fil)
+        if source == target:
+            continue
+        if target in sources:
+            # Target is still taken by a file which is renamed itself
+            temporary = os.path.join(os.path.dirname(target),
+                                     ".vimiv-format-%d-%d" % (os.getpid(), i))
+            renames.append((source, temporary))
+            moved.append((temporary, target))
+        else:
+            renames.append((source, target))
+    return renames + moved
 
 
 class FileExtras(AppComponent):
-    """Extra fileactions for vimiv."""
+    """Extra fileactions for vimiv.
+
+    Attributes:
+        mtimes: Dictionary of directory listings used to find changes when
+            reloading, mtimes[directory] = list_mtimes(directory).
+        started: Time at which vimiv started. Files of directories which were
+            not listed before count as modified if they are newer.
+        format_id: ID of the GLib.Idle renaming files of format_files, -1
+            while the exif data is read.
+        format_moved: Dictionary of files format_files moved to a temporary
+            name, format_moved[temporary] = source.
+        format_renamed: Dictionary of files format_files renamed so far,
+            format_renamed[source] = target.
+    """
 
     def __init__(self, app):
         """Receive and set main vimiv application.
@@ -107,12 +233,21 @@ class FileExtras(AppComponent):
         """
         super().__init__(app)
         self.use_primary = app.settings["GENERAL"]["copy_to_primary"]
+        self.mtimes = {}
+        self.started = systime()
+        self.format_id = 0
+        self.format_moved = {}
+        self.format_renamed = {}
+        self._format_done = 0
+        self._format_total = 0
 
     def format_files(self, string):
         """Format image names in filelist according to a formatstring.
 
         Numbers files in form of formatstring_000.extension. Replaces exif
-        information accordingly.
+        information accordingly. The capture dates are taken from the metadata
+        index in the background, the files are renamed in chunks once the plan
+        was checked for collisions.
 
         Args:
             string: Formatstring to use.
@@ -125,48 +260,143 @@ class FileExtras(AppComponent):
         if not self.app.paths:
             self.app["statusbar"].message("No files in path", "info")
             return
-
+        if self.format_id:
+            self.app["statusbar"].message("Already formatting files", "info")
+            return
+        paths = list(self.app.paths)
         # Check if exifdata is available and needed
-        tofind = ("%" in string)
-        if tofind:
-            try:
-                for fil in self.app.paths:
-                    with Image.open(fil) as im:
-                        exif = im._getexif()
-                        if not (exif and 306 in exif):
-                            raise AttributeError
-            except AttributeError:
-                self.app["statusbar"].message(
-                    "No exif data for %s available" % (fil), "error")
-                return
-
-        for i, fil in enumerate(self.app.paths):
-            ending = os.path.splitext(fil)[1]
-            num = "%03d" % (i + 1)
-            # Exif stuff
-            if tofind:
-                with Image.open(fil) as im:
-                    exif = im._getexif()
-                    date = exif[306]
-                    time = date.split()[1].split(":")
-                    date = date.split()[0].split(":")
-                    outstring = string.replace("%Y", date[0])  # year
-                    outstring = outstring.replace("%m", date[1])  # month
-                    outstring = outstring.replace("%d", date[2])  # day
-                    outstring = outstring.replace("%H", time[0])  # hour
-                    outstring = outstring.replace("%M", time[1])  # minute
-                    outstring = outstring.replace("%S", time[2])  # second
-            else:
-                outstring = string
-            # Ending
-            outstring += num + ending
-            os.rename(fil, outstring)
+        if "%" in string:
+            self.app["statusbar"].message(
+                "Reading exif data of %d files" % (len(paths)), "info")
+            # Blocks further calls until the plan is done
+            self.format_id = -1
+            index_async(paths, self._start_format, paths, string,
+                        error_callback=self._on_format_error)
+        else:
+            self._start_format({}, paths, string)
+
+    def _start_format(self, metadata, paths, string):
+        self.format_id = 0
+        try:
+            renames = plan_format(paths, string, metadata)
+        except ValueError as e:
+            self.app["statusbar"].message(str(e), "error")
+            return False  # To stop the idle callback
+        self._format_done = 0
+        self._format_total = len(renames)
+        self.format_moved = dict(
+            (target, source) for source, target in renames
+            if os.path.basename(target).startswith(".vimiv-format-"))
+        self.format_renamed = {}
+        self.format_id = GLib.idle_add(self._rename_chunk, renames)
+        return False  # To stop the idle callback
+
+    def _rename_chunk(self, renames, chunk_size=100):
+        """Rename the next chunk of files from the plan.
 
+        Args:
+            renames: List of (source, target) tuples still to rename.
+            chunk_size: Amount of files renamed at once.
+        """
+        chunk = renames[:chunk_size]
+        del renames[:chunk_size]
+        for source, target in chunk:
+            try:
+                os.rename(source, target)
+            except OSError as e:
+                self.format_id = 0
+                message = "Formatting stopped: %s" % (e)
+                left = self._restore_moved()
+                if left:
+                    message += ", files left as %s" % (", ".join(left))
+                self.app["statusbar"].message(message, "error")
+                self.reload_changes(os.getcwd(), True,
+                                    renamed=self.format_renamed)
+                return False  # To stop the idle callback
+            # Files moved temporarily are renamed once they reach the target
+            if source in self.format_moved:
+                self.format_renamed[self.format_moved[source]] = target
+            elif target not in self.format_moved:
+                self.format_renamed[source] = target
+        self._format_done += len(chunk)
+        if renames:
+            self.app["statusbar"].message("Formatting %d/%d" % (
+                self._format_done, self._format_total), "info")
+            return True  # To continue with the next chunk
+        self.format_id = 0
+        self.format_moved = {}
         # Reload everything
-        self.reload_changes(os.getcwd(), True)
+        self.reload_changes(os.getcwd(), True, renamed=self.format_renamed)
+        return False  # To stop the idle callback
+
+    def _on_format_error(self, exception):
+        self.format_id = 0
+        self.app["statusbar"].message(
+            "Reading exif data failed: %s" % (exception), "error")
+        return False  # To stop the idle callback
+
+    def _restore_moved(self):
+        """Move files back from their temporary names after an error.
+
+        Return:
+            List of temporary names of files which could not be moved back as
+            their name is taken.
+        """
+        left = []
+        for temporary, source in self.format_moved.items():
+            if not os.path.lexists(temporary):
+                continue  # Already moved to its target
+            if os.path.lexists(source):
+                left.append(temporary)
+                continue
+            try:
+                os.rename(temporary, source)
+            except OSError:
+                left.append(temporary)
+        self.format_moved = {}
+        return left
+
+    def sort(self, mode):
+        """Sort the filelist and the library.
+
+        The current image and search results are kept.
+
+        Args:
+            mode: One of sorting.SORT_MODES.
+        """
+        if mode not in SORT_MODES:
+            self.app["statusbar"].message(
+                "Unknown sort mode %s, use one of %s"
+                % (mode, ", ".join(SORT_MODES)), "error")
+            return
+        self.app.settings["GENERAL"]["sort"] = mode
+        # A running scan sorts once it is done
+        if self.app.paths and not self.app.scanning:
+            thumbnail = self.app["thumbnail"]
+            # Without a selected thumbnail the current image is kept
+            current = thumbnail.toggled and self.app.get_pos(True, "thu") \
+                or self.app.paths[self.app.index]
+            commandline = self.app["commandline"]
+            searched = [self.app.paths[i] for i in commandline.search_positions
+                        if i < len(self.app.paths)] \
+                if commandline.last_focused != "lib" else []
+            # Sorting on request uses the current state of all files
+            forget(self.app.paths)
+            self.app.paths[:] = sort_paths(self.app.paths, mode,
+                                           self.app.resort)
+            self.app.index = self.app.paths.index(current)
+            if searched:
+                positions = dict(
+                    (path, i) for i, path in enumerate(self.app.paths))
+                commandline.search_positions = sorted(
+                    positions[path] for path in searched)
+            if thumbnail.toggled:
+                thumbnail.show(toggled=True)
+        self.reload_changes(os.getcwd(), False)
+        self.app["statusbar"].update_info()
 
     def reload_changes(self, directory, reload_path=True, pipe=False,
-                       pipe_input=None):
+                       pipe_input=None, renamed=None):
         """Reload everything that could have changed.
 
         Reload filelist in library and image and update names accordingly.
@@ -177,6 +407,7 @@ class FileExtras(AppComponent):
                 path.
             pipe: If True, input came from a pipe. Therefore run pipe.
             pipe_input: Command that comes from pipe.
+            renamed: Dictionary of files vimiv renamed, renamed[old] = new.
         """
         # Reload library remembering position
         if (directory == os.getcwd() and directory != self.app["tags"].directory
@@ -193,29 +424,124 @@ class FileExtras(AppComponent):
                 self.app["thumbnail"].iconview.grab_focus()
         # Reload image/thumbnail
         if self.app.paths and reload_path:
-            old_pos_im = self.app.get_pos(False, "im")
-            # Get all files in directory again
-            pathdir = os.path.dirname(self.app.paths[old_pos_im])
-            files = [os.path.join(pathdir, fil)
-                     for fil in sorted(os.listdir(pathdir))]
-            self.app.paths, self.app.index = populate(files)
-            # Expand library if set by user and all paths were removed
-            if self.app["library"].expand and not self.app.paths:
-                self.app["library"].treeview.set_hexpand(True)
-            # Refocus the current position
-            if self.app["thumbnail"].toggled:
-                old_pos_thu = self.app.get_pos(False, "thu")
-                for image in self.app.paths:
-                    self.app["thumbnail"].reload(image)
-                self.app["thumbnail"].move_to_pos(old_pos_thu)
-            else:
-                self.app["eventhandler"].num_str = str(old_pos_im + 1)
-                self.app["image"].move_pos()
+            self.reload_paths(renamed)
         # Run the pipe
         if pipe:
             self.app["commandline"].pipe(pipe_input)
         return False  # To stop the timer
 
+    def reload_paths(self, renamed=None):
+        """Update the imagelist with changes in the current directory.
+
+        The directory listing is compared to the one of the last reload by
+        name and mtime. Only added and modified files are checked.
+
+        Args:
+            renamed: Dictionary of files vimiv renamed, renamed[old] = new.
+                If it is not known, e.g. after an external command, and files
+                of a list of single files were removed, new files are added as
+                they may have been renamed.
+        """
+        pathdir = os.path.dirname(self.app.paths[self.app.get_pos(False,
+                                                                  "im")])
+        old_mtimes = self.mtimes.get(pathdir, {})
+        new_mtimes = list_mtimes(pathdir)
+        self.mtimes[pathdir] = new_mtimes
+
+        def changed(path):
+            if path in old_mtimes:
+                return old_mtimes[path] != new_mtimes[path]
+            return new_mtimes[path] >= self.started
+
+        known = set(self.app.paths)
+        modified = [path for path in self.app.paths
+                    if path in new_mtimes and changed(path)]
+        removed = set(path for path in self.app.paths
+                      if os.path.dirname(path) == pathdir
+                      and path not in new_mtimes)
+        # Only imagelists of complete directories get new images
+        added = [path for path in sorted(new_mtimes)
+                 if path not in known
+                 and (path not in old_mtimes or changed(path))] \
+            if self.app.paths_from_directory \
+            or (removed and renamed is None) else []
+        self.update_paths(removed, added, modified, renamed)
+
+    def update_paths(self, removed, added, modified, renamed=None):
+        """Apply changes of files to the imagelist.
+
+        All other images keep their order and only changed thumbnails are
+        reloaded. The current image, marks and search results are kept.
+
+        Args:
+            removed: Set of paths to remove.
+            added: Sorted list of new paths, only images are added.
+            modified: List of paths in the imagelist which were modified.
+            renamed: Dictionary of renamed paths, renamed[old] = new. Renamed
+                images keep their position in every imagelist.
+        """
+        old_paths = list(self.app.paths)
+        known = set(old_paths)
+        renamed = renamed or {}
+        # Targets may be names other renamed images had before
+        renamed = dict((old, new) for old, new in renamed.items()
+                       if old in known and is_image(new)
+                       and (new not in known or new in renamed))
+        thumbnail = self.app["thumbnail"]
+        old_pos = self.app.get_pos(False, "thu") if thumbnail.toggled \
+            else self.app.get_pos(False, "im")
+        current = old_paths[old_pos] if old_paths else None
+        commandline = self.app["commandline"]
+        searched = [old_paths[i] for i in commandline.search_positions
+                    if i < len(old_paths)] \
+            if commandline.last_focused != "lib" else []
+        # Modified files may not be images anymore
+        removed = set(removed) - set(renamed)
+        removed.update(path for path in modified if not is_image(path))
+        modified = [path for path in modified if path not in removed]
+        modified.extend(renamed.values())
+        added = [path for path in added
+                 if path not in modified and is_image(path)]
+        # Update the imagelist keeping the order of the remaining images, the
+        # list itself is kept as it may still grow in a scan
+        paths = [renamed.get(path, path) for path in old_paths
+                 if path not in removed]
+        current = renamed.get(current, current)
+        searched = [renamed.get(path, path) for path in searched]
+        forget(removed)
+        forget(renamed)
+        forget(modified)
+        forget(added)
+        paths = insert_paths(paths, added, self.app.settings["GENERAL"]["sort"],
+                             self.app.resort)
+        self.app.paths[:] = paths
+        positions = dict((path, i) for i, path in enumerate(paths))
+        # Stay on the current image, its neighbour if it was removed
+        if current in positions:
+            self.app.index = positions[current]
+        else:
+            self.app.index = max(0, min(old_pos, len(paths) - 1))
+        if searched:
+            commandline.search_positions = sorted(
+                positions[path] for path in searched if path in positions)
+        # Expand library if set by user and all paths were removed
+        if self.app["library"].expand and not paths:
+            self.app["library"].treeview.set_hexpand(True)
+        # Refocus the current position
+        if thumbnail.toggled:
+            thumbnail.update(
+                [i for i, path in enumerate(old_paths) if path in removed],
+                [positions[path] for path in added], modified)
+            if paths:
+                thumbnail.move_to_pos(self.app.index)
+        elif paths and (current in removed or current in modified
+                        or paths[self.app.index] != current):
+            self.app["image"].load_image()
+        # Dimensions shown in the statusbar may have changed
+        if modified:
+            self.app["statusbar"].index(modified)
+        self.app["statusbar"].update_info()
+
     def copy_name(self, abspath=False):
         """Copy image name to clipboard.
 
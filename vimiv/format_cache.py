@@ -0,0 +1,93 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Cache for file type probes.
+
+Detecting the format of a file requires opening and sniffing it. As the same
+files are checked again and again, e.g. by the library, the completions and
+whenever the image is updated, the results are cached. Entries are invalidated
+as soon as modification time or size of the file change.
+"""
+
+import collections
+import os
+
+from gi.repository import GdkPixbuf
+from PIL import Image
+
+FormatInfo = collections.namedtuple(
+    "FormatInfo",
+    ["name", "mime_type", "extensions", "width", "height", "animated"])
+
+# _cache[path] = (mtime, size, FormatInfo or None)
+_cache = {}
+_extensions = frozenset()
+
+
+def get_format_info(path, stat=None):
+    """Return information on the format of path.
+
+    Args:
+        path: Path to the file to check.
+        stat: Result of os.stat(path) if it is already known.
+    Return:
+        FormatInfo containing name, MIME type, extensions, dimensions and
+        whether the file is loaded as animation. None if path is not a
+        supported image.
+    """
+    path = os.path.abspath(os.path.expanduser(path))
+    try:
+        stat = stat or os.stat(path)
+    except OSError:
+        _cache.pop(path, None)
+        return None
+    if path in _cache:
+        mtime, size, info = _cache[path]
+        if mtime == stat.st_mtime and size == stat.st_size:
+            return info
+    info = _probe(path)
+    _cache[path] = (stat.st_mtime, stat.st_size, info)
+    return info
+
+
+def _probe(path):
+    file_format, width, height = GdkPixbuf.Pixbuf.get_file_info(path)
+    if not file_format:
+        # Animations GdkPixbuf cannot load are played using PIL
+        return _probe_pil_animation(path)
+    extensions = file_format.get_extensions()
+    mime_types = file_format.get_mime_types()
+    animated = "gif" in extensions
+    if not animated and set(extensions) & set(["png", "webp"]):
+        animated = _probe_pil_animation(path) is not None
+    return FormatInfo(file_format.get_name(),
+                      mime_types[0] if mime_types else "",
+                      extensions, width, height, animated)
+
+
+def _probe_pil_animation(path):
+    """Return FormatInfo of animated WebP and APNG files, None otherwise."""
+    try:
+        with Image.open(path) as im:
+            if im.format not in ["PNG", "WEBP"] \
+                    or not getattr(im, "is_animated", False):
+                return None
+            name = im.format.lower()
+            return FormatInfo(name, Image.MIME.get(im.format, ""), [name],
+                              im.size[0], im.size[1], True)
+    except (IOError, ValueError):
+        return None
+
+
+def get_extensions():
+    """Return the set of lowercase extensions of all loadable formats."""
+    global _extensions
+    if not _extensions:
+        _extensions = frozenset(
+            "." + extension.lower()
+            for file_format in GdkPixbuf.Pixbuf.get_formats()
+            for extension in file_format.get_extensions())
+    return _extensions
+
+
+def clear():
+    """Remove all cached entries."""
+    _cache.clear()
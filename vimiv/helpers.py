@@ -6,20 +6,28 @@ import os
 
 from gi.repository import Gtk
 
+from vimiv.sorting import sort_paths
 
-def listdir_wrapper(path, show_hidden=False):
+
+def listdir_wrapper(path, show_hidden=False, sort_mode="name"):
     """Reimplementation of os.listdir which mustn't show hidden files.
 
     Args:
         path: Path of the directory in which os.listdir is called.
         show_hidden: If true, show hidden files. Else do not.
+        sort_mode: One of sorting.SORT_MODES.
     Return:
         Sorted list of files in path.
     """
-    all_files = sorted(os.listdir(os.path.expanduser(path)))
-    if show_hidden:
+    path = os.path.expanduser(path)
+    all_files = sorted(os.listdir(path))
+    if not show_hidden:
+        all_files = [fil for fil in all_files if not fil.startswith(".")]
+    if sort_mode == "name":
         return all_files
-    return [fil for fil in all_files if not fil.startswith(".")]
+    paths = sort_paths([os.path.join(path, fil) for fil in all_files],
+                       sort_mode)
+    return [os.path.basename(fil) for fil in paths]
 
 
 def read_file(filename):
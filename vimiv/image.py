@@ -1,9 +1,13 @@
 # vim: ft=python fileencoding=utf-8 sw=4 et sts=4
 """Image part of vimiv."""
 
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool as Pool
 from random import shuffle
 
+from gi._error import GError
 from gi.repository import GdkPixbuf, GLib, Gtk
+from vimiv.animation import Animation, get_frame_source
 from vimiv.slideshow import Slideshow
 from vimiv.window import Window
 from vimiv.library import Library
@@ -12,7 +16,11 @@ from vimiv.eventhandler import KeyHandler
 from vimiv.manipulate import Manipulate
 from vimiv.statusbar import Statusbar
 from vimiv.app_component import AppComponent
+from vimiv.format_cache import get_format_info
 from vimiv.helpers import get_float_from_str
+from vimiv.image_header import get_header
+from vimiv.perf import Perf
+from vimiv.pyramid import ImagePyramid
 
 
 class Image(AppComponent):
@@ -35,14 +43,39 @@ class Image(AppComponent):
         overzoom: If True, increase image size up to window size even if images
             are smaller than window.
         rescale_svg: If True rescale vector graphics when zooming.
+        pyramid_threshold: Size in megapixels from which on images are shown
+            from an image pyramid. 0 to disable.
+        pyramid_cache: If True cache downsampled pyramid levels on disk.
+        decode_to_fit: If True decode images only at the size they are
+            displayed at. The full resolution is decoded once zooming beyond.
         shuffle: If True randomly shuffle paths.
         zoom_percent: Percentage to zoom to compared to the original size.
         imsize: Size of the displayed image as a tuple.
-        pixbuf_original: Original image.
-        pixbuf_iter: Iter of displayed animation.
+        pixbuf_original: Original image. In pyramid mode the currently used
+            level of the pyramid.
+        pyramid: ImagePyramid of the current image if it is large enough or
+            decode_to_fit is enabled.
+        animation: Animation of the current image decoded in the background.
         timer_id: Id of current animation timer.
+        refine_id: Id of the timer replacing a quick preview with the
+            high-quality image.
+        refine_delay: Time in ms without zooming after which the quick preview
+            is refined.
+        svg_cache: OrderedDict of vector graphics rasterized in the background.
+            svg_cache[(path, height)] = GdkPixbuf.Pixbuf
+        svg_cache_size: Maximum amount of rasters kept in svg_cache.
+        svg_pending: Set of (path, height) keys currently being rasterized.
+        load_id: Id of the timer loading the image once navigating stops.
+        last_move: Monotonic time in microseconds of the last navigation by
+            key.
+        skim_delay: Time in ms between navigation keys below which images are
+            skimmed, i.e. only the image at which navigation stops is loaded.
+        released: If True the decoded image was released as the image is not
+            visible, i.e. in thumbnail mode or while the library is expanded.
     """
 
+    _svg_pool = Pool(1)
+
     def __init__(self, app, settings):
         """Set default values for attributes."""
         super().__init__(app)
@@ -61,19 +94,35 @@ class Image(AppComponent):
         self.viewport.add(self.image)
         self.scrolled_win.connect("key_press_event",
                                   app["eventhandler"].run, "IMAGE")
+        # Decoded images are not needed while only the library is shown
+        self.scrolled_win.connect("hide", self._on_hide)
+        self.scrolled_win.connect("show", self._on_show)
 
         # Settings
         self.animation_toggled = False
         self.fit_image = 1  # Checks if the image fits the window somehow
         self.overzoom = general["overzoom"]
         self.rescale_svg = general["rescale_svg"]
+        self.pyramid_threshold = general["pyramid_threshold"]
+        self.pyramid_cache = general["pyramid_cache"]
+        self.decode_to_fit = general["decode_to_fit"]
         self.shuffle = general["shuffle"]
         self.zoom_percent = 1
         self.imsize = [0, 0]
         self.is_anim = False
         self.pixbuf_original = GdkPixbuf.Pixbuf()
-        self.pixbuf_iter = GdkPixbuf.PixbufAnimationIter()
+        self.pyramid = None
+        self.animation = None
         self.timer_id = 0
+        self.refine_id = 0
+        self.refine_delay = 150
+        self.svg_cache = OrderedDict()
+        self.svg_cache_size = 8
+        self.svg_pending = set()
+        self.load_id = 0
+        self.last_move = 0
+        self.skim_delay = 100
+        self.released = False
 
     def check_for_edit(self, force):
         """Check if an image was edited before moving.
@@ -93,17 +142,18 @@ class Image(AppComponent):
             return 1
         return 0
 
-    def get_zoom_percent_to_fit(self, fit=1):
+    def get_zoom_percent_to_fit(self, fit=1, size=None):
         """Get the zoom factor perfectly fitting the image to the window.
 
         Args:
             fit: See self.fit_image attribute.
+            size: Size of the image to fit as tuple. Defaults to the size of
+                the current image.
         Return:
             Zoom percentage.
         """
         # Size of the file
-        pbo_width = self.pixbuf_original.get_width()
-        pbo_height = self.pixbuf_original.get_height()
+        pbo_width, pbo_height = size if size else self.get_original_size()
         pbo_scale = pbo_width / pbo_height
         # Size of the image to be shown
         w_scale = self.imsize[0] / self.imsize[1]
@@ -119,53 +169,211 @@ class Image(AppComponent):
         # "Panorama/landscape" image
         return self.imsize[0] / pbo_width
 
-    def update(self, update_info=True, update_gif=True):
+    def get_original_size(self):
+        """Return the size of the original image as tuple.
+
+        In pyramid mode pixbuf_original only holds a downsampled level, the real
+        size is stored in the pyramid.
+        """
+        if self.is_anim and self.animation:
+            return self.animation.width, self.animation.height
+        if self.pyramid:
+            return self.pyramid.width, self.pyramid.height
+        return (self.pixbuf_original.get_width(),
+                self.pixbuf_original.get_height())
+
+    def update(self, update_info=True, update_gif=True, quick=False):
         """Show the final image.
 
         Args:
             update_info: If True update the statusbar with new information.
             update_gif: If True update animation status.
+            quick: If True only show a quick preview scaled from the displayed
+                image and render the high-quality image once zooming stops.
         """
-        if not self.app.paths:
+        if not self.app.paths or self.released:
             return
+        # Any pending refinement is outdated now
+        if self.refine_id:
+            GLib.source_remove(self.refine_id)
+            self.refine_id = 0
         # Start playing an animation if it is one
-        if self.is_anim and update_gif:
-            if not self.animation_toggled:
-                delay = self.pixbuf_iter.get_delay_time()
-                self.timer_id = GLib.timeout_add(delay, self.play_gif)
-                self.play_gif()
-            else:
-                self.pause_gif()
+        if self.is_anim:
+            self._update_animation(update_gif)
         # Otherwise scale the image
         else:
-            pbo_width = self.pixbuf_original.get_width()
-            pbo_height = self.pixbuf_original.get_height()
-            pbf_width = int(pbo_width * self.zoom_percent)
-            pbf_height = int(pbo_height * self.zoom_percent)
-            # Rescaling of svg
-            name = self.app.paths[self.app.index]
-            info = GdkPixbuf.Pixbuf.get_file_info(name)[0]
-            if info and "svg" in info.get_extensions():
-                pixbuf_final = GdkPixbuf.Pixbuf.new_from_file_at_scale(
-                    self.app.paths[self.app.index], -1, pbf_height, True)
-            else:
-                pixbuf_final = self.pixbuf_original.scale_simple(
-                    pbf_width, pbf_height, GdkPixbuf.InterpType.BILINEAR)
-            self.image.set_from_pixbuf(pixbuf_final)
+            pixbuf_final = self._get_scaled_pixbuf(quick)
+            with self.get_component(Perf).measure("set_from_pixbuf"):
+                self.image.set_from_pixbuf(pixbuf_final)
         # Update the statusbar if required
         if update_info:
             self.get_component(Statusbar).update_info()
 
-    def play_gif(self):
-        """Run the animation of a gif."""
-        image = self.pixbuf_iter.get_pixbuf()
-        self.image.set_from_pixbuf(image)
-        if self.pixbuf_iter.advance():
-            GLib.source_remove(self.timer_id)
-            delay = self.pixbuf_iter.get_delay_time()
-            # Do not animate static gifs
-            self.timer_id = GLib.timeout_add(delay, self.play_gif) \
-                if delay >= 0 else 0
+    def _update_animation(self, update_gif):
+        """Scale the animation to the zoom level and play or pause it.
+
+        Args:
+            update_gif: If True update animation status.
+        """
+        self.animation.set_zoom(self.zoom_percent)
+        if update_gif:
+            if self.timer_id:
+                GLib.source_remove(self.timer_id)
+                self.timer_id = 0
+            if not self.animation_toggled:
+                self.play_gif()
+            else:
+                self.pause_gif()
+            return
+        # Scale the shown frame until the rescaled one is decoded
+        if self.image.get_pixbuf():
+            pbo_width, pbo_height = self.get_original_size()
+            self.image.set_from_pixbuf(
+                self.image.get_pixbuf().scale_simple(
+                    int(pbo_width * self.zoom_percent),
+                    int(pbo_height * self.zoom_percent),
+                    GdkPixbuf.InterpType.NEAREST))
+        # A paused animation must be refreshed explicitly
+        if not self.timer_id:
+            self.play_gif(keep_playing=False)
+
+    def _get_scaled_pixbuf(self, quick):
+        """Return the current image scaled to the zoom level.
+
+        Args:
+            quick: If True scale the displayed image using nearest neighbour
+                and refine it once zooming stops.
+        """
+        perf = self.get_component(Perf)
+        pbo_width, pbo_height = self.get_original_size()
+        pbf_width = int(pbo_width * self.zoom_percent)
+        pbf_height = int(pbo_height * self.zoom_percent)
+        path = self.app.paths[self.app.index]
+        # Nearest neighbour scaling of the already scaled image is cheap
+        if quick and self.image.get_pixbuf():
+            self.refine_id = GLib.timeout_add(self.refine_delay, self.refine)
+            with perf.measure("scale", mode="quick", width=pbf_width,
+                              height=pbf_height):
+                return self.image.get_pixbuf().scale_simple(
+                    pbf_width, pbf_height, GdkPixbuf.InterpType.NEAREST)
+        info = get_format_info(path)
+        # Rescaling of svg
+        if self.rescale_svg and info and "svg" in info.extensions:
+            with perf.measure("scale", mode="svg", width=pbf_width,
+                              height=pbf_height):
+                return self.get_svg_raster(path, pbf_width, pbf_height)
+        # Render from the closest level of the pyramid
+        if self.pyramid:
+            self._load_pyramid_level(info)
+        with perf.measure("scale", mode="bilinear", width=pbf_width,
+                          height=pbf_height):
+            return self.pixbuf_original.scale_simple(
+                pbf_width, pbf_height, GdkPixbuf.InterpType.BILINEAR)
+
+    def _load_pyramid_level(self, info):
+        """Set pixbuf_original to the pyramid level closest to the zoom level.
+
+        Args:
+            info: FormatInfo of the current image, None if it was removed.
+        """
+        level = self.pyramid.get_level(self.zoom_percent)
+        if level in self.pyramid.levels:
+            self.pixbuf_original = self.pyramid.get_pixbuf(self.zoom_percent)
+            return
+        # Loading a new level decodes the image
+        width, height = self.pyramid.get_level_size(level)
+        with self.get_component(Perf).measure(
+                "decode", format=info.name if info else "", width=width,
+                height=height, level=level):
+            self.pixbuf_original = self.pyramid.get_pixbuf(self.zoom_percent)
+
+    def get_svg_raster(self, path, width, height):
+        """Return a raster of the vector graphic path at the given size.
+
+        Rasters not in the cache are created in the background. Until they are
+        ready, the last raster of path is scaled to the requested size.
+
+        Args:
+            path: Path to the vector graphic.
+            width: Width of the raster.
+            height: Height of the raster.
+        Return:
+            The cached raster or the scaled preview.
+        """
+        key = (path, height)
+        if key in self.svg_cache:
+            self.svg_cache.move_to_end(key)
+            return self.svg_cache[key]
+        if key not in self.svg_pending:
+            self.svg_pending.add(key)
+            self._svg_pool.apply_async(self._do_rasterize_svg, (path, height),
+                                       callback=self._do_callback)
+        rasters = [raster for (name, _), raster in self.svg_cache.items()
+                   if name == path]
+        previous = rasters[-1] if rasters else self.pixbuf_original
+        return previous.scale_simple(width, height,
+                                     GdkPixbuf.InterpType.BILINEAR)
+
+    def _do_rasterize_svg(self, path, height):
+        try:
+            pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(path, -1, height,
+                                                             True)
+        except GError:
+            pixbuf = None
+        return self._on_svg_rasterized, pixbuf, path, height
+
+    @staticmethod
+    def _do_callback(result):
+        GLib.idle_add(*result)
+
+    def _on_svg_rasterized(self, pixbuf, path, height):
+        key = (path, height)
+        self.svg_pending.discard(key)
+        if not pixbuf:
+            return False
+        self.svg_cache[key] = pixbuf
+        while len(self.svg_cache) > self.svg_cache_size:
+            self.svg_cache.popitem(last=False)
+        # Only show the raster if it is still the requested one
+        if self.app.paths and self.app.paths[self.app.index] == path \
+                and not self.is_anim and not self.refine_id \
+                and int(self.get_original_size()[1] * self.zoom_percent) \
+                == height:
+            self.image.set_from_pixbuf(pixbuf)
+        return False  # To stop the idle callback
+
+    def refine(self):
+        """Replace the quick preview with the high-quality image."""
+        self.refine_id = 0
+        self.update(update_info=False, update_gif=False)
+        return False  # To stop the timer
+
+    def play_gif(self, keep_playing=True):
+        """Show the next frame of an animation.
+
+        Args:
+            keep_playing: If True schedule the following frame.
+        """
+        self.timer_id = 0
+        frame = self.animation.get_frame()
+        # Nothing can be decoded anymore
+        if frame is None and self.animation.stopped:
+            return False
+        # Frame is still being decoded, try again shortly
+        if frame is None:
+            self.timer_id = GLib.timeout_add(10, self.play_gif, keep_playing)
+            return False
+        pixbuf, delay = frame
+        self.image.set_from_pixbuf(pixbuf)
+        # Do not animate static gifs
+        if keep_playing and delay >= 0:
+            self.timer_id = GLib.timeout_add(delay, self.play_gif)
+        return False  # The next timer was added explicitly
+
+    def _on_animation_error(self, exception):
+        self.get_component(Statusbar).message(
+            "Error decoding animation: %s" % (exception), "error")
+        return False  # To stop the idle callback
 
     def pause_gif(self):
         """Pause a gif or show initial image."""
@@ -173,8 +381,7 @@ class Image(AppComponent):
             GLib.source_remove(self.timer_id)
             self.timer_id = 0
         else:
-            image = self.pixbuf_iter.get_pixbuf()
-            self.image.set_from_pixbuf(image)
+            self.play_gif(keep_playing=False)
 
     def get_available_size(self):
         """Receive size not occupied by other Widgets.
@@ -202,36 +409,32 @@ class Image(AppComponent):
         """
         delta = 0.25
         statusbar = self.get_component(Statusbar)
-        if self.is_anim:
-            statusbar.message("Zoom not supported for gif files", "warning")
+        # Allow user steps
+        step = self.get_component(KeyHandler).num_receive(step, True)
+        if isinstance(step, str):
+            step, err = get_float_from_str(step)
+            if err:
+                statusbar.message(
+                    "Argument for zoom must be of type float", "error")
+                return
+        fallback_zoom = self.zoom_percent
+        if zoom_in:
+            self.zoom_percent = self.zoom_percent * (1 + delta * step)
         else:
-            # Allow user steps
-            step = self.get_component(KeyHandler).num_receive(step, True)
-            if isinstance(step, str):
-                step, err = get_float_from_str(step)
-                if err:
-                    statusbar.message(
-                        "Argument for zoom must be of type float", "error")
-                    return
-            fallback_zoom = self.zoom_percent
-            if zoom_in:
-                self.zoom_percent = self.zoom_percent * (1 + delta * step)
-            else:
-                self.zoom_percent = self.zoom_percent / (1 + delta * step)
-            self.catch_unreasonable_zoom_and_update(fallback_zoom)
-            self.fit_image = 0
+            self.zoom_percent = self.zoom_percent / (1 + delta * step)
+        # Held zoom keys repeat faster than high-quality scaling
+        self.catch_unreasonable_zoom_and_update(fallback_zoom, quick=True)
+        self.fit_image = 0
 
-    def zoom_to(self, percent=0, fit=1):
+    def zoom_to(self, percent=0, fit=1, quick=False):
         """Zoom to a given percentage.
 
         Args:
             percent: Percentage to zoom to.
             fit: See self.fit_image attribute.
+            quick: If True show a quick preview first. See self.update.
         """
         statusbar = self.get_component(Statusbar)
-        if self.is_anim:
-            statusbar.message("Zoom not supported for gif files", "warning")
-            return
         fallback_zoom = self.zoom_percent
         # Catch user zooms
         percent = self.get_component(KeyHandler).num_receive(percent, True)
@@ -251,26 +454,24 @@ class Image(AppComponent):
             self.zoom_percent = self.get_zoom_percent_to_fit(fit)
             self.fit_image = fit
         # Catch some unreasonable zooms
-        self.catch_unreasonable_zoom_and_update(fallback_zoom)
+        self.catch_unreasonable_zoom_and_update(fallback_zoom, quick)
 
-    def catch_unreasonable_zoom_and_update(self, fallback_zoom):
+    def catch_unreasonable_zoom_and_update(self, fallback_zoom, quick=False):
         """Catch unreasonable zooms otherwise update.
 
         Args:
             fallback_zoom: Zoom percentage to fall back to if the zoom
                 percentage is unreasonable.
+            quick: If True show a quick preview first. See self.update.
         """
         window = self.get_component(Window)
-        orig_width = self.pixbuf_original.get_width()
-        orig_height = self.pixbuf_original.get_height()
+        orig_width, orig_height = self.get_original_size()
         new_width = orig_width * self.zoom_percent
         new_height = orig_height * self.zoom_percent
         min_width = max(16, orig_width * 0.05)
         min_height = max(16, orig_height * 0.05)
-        max_width = min(window.get_size()[0] * 10,
-                        self.pixbuf_original.get_width() * 20)
-        max_height = min(window.get_size()[1] * 10,
-                         self.pixbuf_original.get_height() * 20)
+        max_width = min(window.get_size()[0] * 10, orig_width * 20)
+        max_height = min(window.get_size()[1] * 10, orig_height * 20)
         # Image too small or too large
         if new_height < min_height or new_width < min_width \
                 or new_height > max_height or new_width > max_width:
@@ -278,7 +479,7 @@ class Image(AppComponent):
             self.get_component(Statusbar).message(message, "warning")
             self.zoom_percent = fallback_zoom
         else:
-            self.update(update_gif=False)
+            self.update(update_gif=False, quick=quick)
 
     def center_window(self):
         """Centre the image in the current window."""
@@ -353,8 +554,16 @@ class Image(AppComponent):
         if self.shuffle and self.app.index is 0 and delta > 0:
             shuffle(self.app.paths)
 
+        # Held navigation keys repeat faster than images can be decoded, only
+        # load the image at which navigation stops
+        now = GLib.get_monotonic_time()
+        skimming = key and now - self.last_move < self.skim_delay * 1000
+        self.last_move = now if key else 0
+        if skimming:
+            self.skim()
         # Load the image at path into self.pixbuf_* and show it
-        self.load_image()
+        else:
+            self.load_image()
 
         # Info if slideshow returns to beginning
         slideshow = self.get_component(Slideshow)
@@ -369,24 +578,178 @@ class Image(AppComponent):
 
         return True  # for the slideshow
 
+    def skim(self):
+        """Show a preview of the current image and load it once idle.
+
+        The preview is the thumbnail of the image if one was created before.
+        The zoom level is calculated from the image header so the statusbar is
+        correct before the image is decoded.
+        """
+        # Frames or refinements of the previous image must not replace the
+        # preview
+        for timer in ["timer_id", "refine_id", "load_id"]:
+            if getattr(self, timer):
+                GLib.source_remove(getattr(self, timer))
+                setattr(self, timer, 0)
+        if self.animation:
+            self.animation.stop()
+            self.animation = None
+        self.is_anim = False
+        self.load_id = GLib.timeout_add(self.skim_delay,
+                                        self._load_skimmed_image)
+        path = self.app.paths[self.app.index]
+        header = get_header(path)
+        if header:
+            self.imsize = self.get_available_size()
+            self.zoom_percent = self.get_zoom_percent_to_fit(
+                size=(header.width, header.height))
+        thumbnail_manager = self.get_component(Thumbnail).thumbnail_manager
+        pixbuf = thumbnail_manager.get_cached_thumbnail(path)
+        if pixbuf:
+            if header:
+                size = max(header.width, header.height) * self.zoom_percent
+            else:
+                width, height = self.get_available_size()
+                size = max(pixbuf.get_width(), pixbuf.get_height()) \
+                    * min(width / pixbuf.get_width(),
+                          height / pixbuf.get_height())
+            self.image.set_from_pixbuf(
+                thumbnail_manager.scale_pixbuf(pixbuf, max(int(size), 1)))
+        self.get_component(Statusbar).update_info()
+
+    def _load_skimmed_image(self):
+        self.load_id = 0
+        self.load_image()
+        return False  # To stop the timer
+
+    def release(self):
+        """Release all decoded images while the image is not visible.
+
+        They are loaded again by restore() once the image is shown again.
+        """
+        if self.released or not self.app.paths \
+                or (self.pixbuf_original.get_height() == 1
+                    and not self.animation):
+            return
+        for timer in ["timer_id", "refine_id", "load_id"]:
+            if getattr(self, timer):
+                GLib.source_remove(getattr(self, timer))
+                setattr(self, timer, 0)
+        if self.animation:
+            self.animation.stop()
+            self.animation = None
+        self.pyramid = None
+        self.pixbuf_original = GdkPixbuf.Pixbuf()
+        self.image.clear()
+        self.get_component(Manipulate).release()
+        self.released = True
+
+    def restore(self):
+        """Load a released image again once the main loop is idle.
+
+        If a new image is loaded before, nothing has to be restored.
+        """
+        if self.released:
+            GLib.idle_add(self._restore)
+
+    def _restore(self):
+        # The image may have been hidden again meanwhile
+        if self.released and self.app.paths \
+                and self.scrolled_win.get_visible() \
+                and not self.get_component(Thumbnail).toggled:
+            zoom_percent, fit_image = self.zoom_percent, self.fit_image
+            self.load_image()
+            # Rotations and flips not written to the file yet are shown again
+            pending = self.get_component(Manipulate).simple_manipulations.get(
+                self.app.paths[self.app.index])
+            if pending and not self.is_anim:
+                self._apply_simple_manipulations(*pending)
+                if fit_image:
+                    self.zoom_percent = self.get_zoom_percent_to_fit(fit_image)
+                    self.update(update_info=False)
+            # Keep the zoom level of the user
+            if not fit_image:
+                self.zoom_percent = zoom_percent
+                self.fit_image = 0
+                self.update(update_info=False)
+        return False  # To stop the idle callback
+
+    def _apply_simple_manipulations(self, rotation, flip_horizontal,
+                                    flip_vertical):
+        """Rotate and flip the loaded image like the file will be."""
+        if self.pyramid:
+            if rotation:
+                self.pyramid.rotate(rotation)
+            if flip_horizontal:
+                self.pyramid.flip(1)
+            if flip_vertical:
+                self.pyramid.flip(0)
+            return
+        if rotation:
+            self.pixbuf_original = \
+                self.pixbuf_original.rotate_simple(90 * rotation)
+        if flip_horizontal:
+            self.pixbuf_original = self.pixbuf_original.flip(True)
+        if flip_vertical:
+            self.pixbuf_original = self.pixbuf_original.flip(False)
+
+    def _on_hide(self, widget):
+        self.release()
+
+    def _on_show(self, widget):
+        self.restore()
+
     def load_image(self):
         """Load an image using GdkPixbufLoader."""
+        self.released = False
+        # Loading the image ends skimming
+        if self.load_id:
+            GLib.source_remove(self.load_id)
+            self.load_id = 0
         path = self.app.paths[self.app.index]
         # Remove old timers
         if self.timer_id:
             self.pause_gif()
+        perf = self.get_component(Perf)
         # Load file
         try:
-            info = GdkPixbuf.Pixbuf.get_file_info(path)[0]
-            if "gif" in info.get_extensions():
+            with perf.measure("stat"):
+                info = get_format_info(path)
+            if not info:
+                raise FileNotFoundError(path)
+            if self.animation:
+                self.animation.stop()
+                self.animation = None
+            if info.animated:
                 self.is_anim = True
-                anim = GdkPixbuf.PixbufAnimation.new_from_file(path)
-                self.pixbuf_iter = anim.get_iter()
+                self.pyramid = None
+                with perf.measure("decode", format=info.name,
+                                  width=info.width, height=info.height,
+                                  animated=True):
+                    self.animation = Animation(
+                        get_frame_source(path, info),
+                        error_callback=self._on_animation_error)
             else:
                 self.is_anim = False
-                self.pixbuf_original = GdkPixbuf.Pixbuf.new_from_file(path)
-                self.imsize = self.get_available_size()
-                self.zoom_percent = self.get_zoom_percent_to_fit()
+                # Huge images are rendered from a lazily loaded pyramid
+                if self.pyramid_threshold and \
+                        info.width * info.height >= \
+                        self.pyramid_threshold * 1e6:
+                    self.pyramid = ImagePyramid(path, info.width, info.height,
+                                                self.pyramid_cache)
+                # Only decode the level required to fit the image, the
+                # full resolution is loaded once the user zooms in
+                elif self.decode_to_fit and "svg" not in info.extensions:
+                    self.pyramid = ImagePyramid(path, info.width, info.height,
+                                                use_cache=False)
+                else:
+                    self.pyramid = None
+                    with perf.measure("decode", format=info.name,
+                                      width=info.width, height=info.height):
+                        self.pixbuf_original = \
+                            GdkPixbuf.Pixbuf.new_from_file(path)
+            self.imsize = self.get_available_size()
+            self.zoom_percent = self.get_zoom_percent_to_fit()
             self.update(update_info=True)
         except (PermissionError, FileNotFoundError):
             self.app.paths.remove(path)
@@ -0,0 +1,162 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Read the dimensions of images from their file headers.
+
+Only the few bytes required to find the size and orientation are read, no
+pixels are decoded. Supported are JPEG (SOF and EXIF orientation), PNG
+(IHDR), GIF, WebP (VP8, VP8L and VP8X) and TIFF. The results are cached
+until the file changes.
+"""
+
+import collections
+import io
+import os
+import struct
+
+ImageHeader = collections.namedtuple("ImageHeader",
+                                     ["width", "height", "orientation"])
+
+# _cache[path] = (mtime, size, ImageHeader or None)
+_cache = {}
+
+# Start of frame markers, 0xC4 (DHT), 0xC8 (JPG) and 0xCC (DAC) are no frames
+_SOF_MARKERS = set(range(0xC0, 0xD0)) - set([0xC4, 0xC8, 0xCC])
+
+_TAG_WIDTH = 256
+_TAG_HEIGHT = 257
+_TAG_ORIENTATION = 274
+
+
+def get_header(path):
+    """Return the header information of path.
+
+    Args:
+        path: Path to the image to probe.
+    Return:
+        ImageHeader containing width, height and EXIF orientation. None if
+        the format is not supported or the header is invalid.
+    """
+    path = os.path.abspath(os.path.expanduser(path))
+    try:
+        stat = os.stat(path)
+    except OSError:
+        _cache.pop(path, None)
+        return None
+    if path in _cache:
+        mtime, size, header = _cache[path]
+        if mtime == stat.st_mtime and size == stat.st_size:
+            return header
+    header = read_header(path)
+    _cache[path] = (stat.st_mtime, stat.st_size, header)
+    return header
+
+
+def read_header(path):
+    """Read the header of path without using the cache.
+
+    Args:
+        path: Path to the image to probe.
+    Return:
+        ImageHeader or None, see get_header.
+    """
+    try:
+        with open(path, "rb") as f:
+            start = f.read(32)
+            f.seek(0)
+            if start.startswith(b"\xff\xd8"):
+                return _read_jpeg(f)
+            elif start.startswith(b"\x89PNG\r\n\x1a\n") \
+                    and start[12:16] == b"IHDR":
+                width, height = struct.unpack(">II", start[16:24])
+                return ImageHeader(width, height, 1)
+            elif start[:6] in [b"GIF87a", b"GIF89a"]:
+                width, height = struct.unpack("<HH", start[6:10])
+                return ImageHeader(width, height, 1)
+            elif start.startswith(b"RIFF") and start[8:12] == b"WEBP":
+                return _read_webp(start)
+            elif start[:4] in [b"II*\x00", b"MM\x00*"]:
+                tags = _read_tiff_tags(f)
+                if _TAG_WIDTH in tags and _TAG_HEIGHT in tags:
+                    return ImageHeader(tags[_TAG_WIDTH], tags[_TAG_HEIGHT],
+                                       tags.get(_TAG_ORIENTATION, 1))
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+def clear():
+    """Remove all cached entries."""
+    _cache.clear()
+
+
+def _read_jpeg(f):
+    f.seek(2)
+    orientation = 1
+    while True:
+        # Markers may be padded with any amount of 0xFF
+        byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        # End of image
+        if marker == 0xD9:
+            return None
+        # Markers without any data
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            continue
+        length = struct.unpack(">H", f.read(2))[0]
+        if marker in _SOF_MARKERS:
+            height, width = struct.unpack(">xHH", f.read(5))
+            return ImageHeader(width, height, orientation)
+        # Image data starts, there was no frame
+        elif marker == 0xDA:
+            return None
+        elif marker == 0xE1:
+            data = f.read(length - 2)
+            if data.startswith(b"Exif\x00\x00"):
+                tags = _read_tiff_tags(io.BytesIO(data[6:]))
+                orientation = tags.get(_TAG_ORIENTATION, orientation)
+        else:
+            f.seek(length - 2, io.SEEK_CUR)
+
+
+def _read_webp(start):
+    # The dimensions of all chunk types are within the first 30 bytes
+    if len(start) < 30:
+        return None
+    chunk = start[12:16]
+    if chunk == b"VP8 " and start[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", start[26:30])
+        return ImageHeader(width & 0x3FFF, height & 0x3FFF, 1)
+    elif chunk == b"VP8L" and start[20] == 0x2F:
+        bits = struct.unpack("<I", start[21:25])[0]
+        return ImageHeader((bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1,
+                           1)
+    elif chunk == b"VP8X":
+        width = int.from_bytes(start[24:27], "little") + 1
+        height = int.from_bytes(start[27:30], "little") + 1
+        return ImageHeader(width, height, 1)
+    return None
+
+
+def _read_tiff_tags(f):
+    """Return the size and orientation tags of the first IFD of a TIFF."""
+    order = "<" if f.read(2) == b"II" else ">"
+    magic, offset = struct.unpack(order + "HI", f.read(6))
+    if magic != 42:
+        return {}
+    f.seek(offset)
+    tags = {}
+    n_entries = struct.unpack(order + "H", f.read(2))[0]
+    for _ in range(n_entries):
+        tag, field_type, _, value = \
+            struct.unpack(order + "HHI4s", f.read(12))
+        if tag not in [_TAG_WIDTH, _TAG_HEIGHT, _TAG_ORIENTATION]:
+            continue
+        # SHORT values are stored in the first two bytes, LONG in all four
+        if field_type == 3:
+            tags[tag] = struct.unpack(order + "H", value[:2])[0]
+        elif field_type == 4:
+            tags[tag] = struct.unpack(order + "I", value)[0]
+    return tags
@@ -7,6 +7,8 @@ from subprocess import PIPE, Popen
 
 from PIL import Image
 
+from vimiv.metadata import get_metadata_many
+
 
 def save_image(im, filename):
     """Save the image with all the exif keys that exist.
@@ -82,28 +84,23 @@ def autorotate(filelist, method="auto"):
         # Added to the message displayed when done
         method = "jhead"
     elif method == "PIL":
+        # Only images with orientation info in the index are opened
+        metadata = get_metadata_many(filelist)
         for path in filelist:
+            orientation = metadata[path].orientation if metadata[path] else 1
+            if orientation not in [3, 6, 8]:
+                continue
             with Image.open(path) as im:
-                exif = im._getexif()
-                orientation_key = 274  # cf ExifTags
-                rotated = True
-
-                # Only do something if orientation info is there
-                if exif and orientation_key in exif:
-                    orientation = exif[orientation_key]
-                    # Rotate and save the image
-                    if orientation == 3:
-                        im = im.transpose(Image.ROTATE_180)
-                    elif orientation == 6:
-                        im = im.transpose(Image.ROTATE_270)
-                    elif orientation == 8:
-                        im = im.transpose(Image.ROTATE_90)
-                    else:
-                        rotated = False
-                    if rotated:
-                        save_image(im, path)
-                        rotated_images += 1
-            method = "PIL"
+                # Rotate and save the image
+                if orientation == 3:
+                    im = im.transpose(Image.ROTATE_180)
+                elif orientation == 6:
+                    im = im.transpose(Image.ROTATE_270)
+                else:
+                    im = im.transpose(Image.ROTATE_90)
+                save_image(im, path)
+                rotated_images += 1
+        method = "PIL"
 
     # Return the amount of rotated images and the method used
     return rotated_images, method
@@ -2,12 +2,18 @@
 """Library part of self.app."""
 
 import os
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool as Pool
+from stat import S_ISDIR
 
-from gi.repository import Gdk, Gtk
+from gi.repository import Gdk, GLib, Gtk
 
 from vimiv.app_component import AppComponent
-from vimiv.fileactions import is_image, populate
+from vimiv.fileactions import has_image_extension, is_image, populate
+from vimiv.format_cache import get_format_info
 from vimiv.helpers import listdir_wrapper, sizeof_fmt
+from vimiv.library_model import LibraryModel
+from vimiv.sorting import forget, sort_paths
 
 
 class Library(AppComponent):
@@ -30,14 +36,31 @@ class Library(AppComponent):
         desktop_start_dir: Directory to start in if launched from desktop.
         tilde_in_statusbar: If True, collapse $HOME to ~ in statusbar.
         files: Files in the library.
-        filesize: Dictionary storing the size of files.
+        filesize: Dictionary storing the size of files. Directories show the
+            pending marker until their images were counted in the background.
+        fileinfo: Dictionary storing the type of files from the listing,
+            fileinfo[fil] = (is_directory, target of symbolic link or None,
+            st_mtime_ns).
+        count_generation: Number of the current listing. Counts of directories
+            of older listings are dropped.
+        listings: OrderedDict of processed listings of recently visited
+            directories, listings[directory] = (key, files, filesize,
+            fileinfo). The key contains the mtime of the directory so changed
+            directories are listed again.
+        listings_size: Maximum amount of listings kept in listings.
         grid: Gtk.Grid containing the TreeView and the border.
         scrollable_treeview: Gtk.ScrolledWindow in which the TreeView gets
             packed.
-        treeview: Gtk.TreeView object with own liststore model containing
+        treeview: Gtk.TreeView object with own LibraryModel containing
             number, filename, filesize and is_marked.
+        fixed_height_threshold: Amount of files from which on all rows have the
+            same height. Only the visible rows are created then.
     """
 
+    # Counting images waits on the disk most of the time
+    _count_pool = Pool(max(4, 2 * (os.cpu_count() or 1)))
+    pending_marker = "…"
+
     def __init__(self, app, settings):
         """Create the necessary objects and settings.
 
@@ -64,6 +87,11 @@ class Library(AppComponent):
         # Defaults
         self.files = []
         self.filesize = {}
+        self.fileinfo = {}
+        self.count_generation = 0
+        self.listings = OrderedDict()
+        self.listings_size = 32
+        self.fixed_height_threshold = 5000
 
         # Grid with treeview and border
         self.grid = Gtk.Grid()
@@ -97,8 +125,8 @@ class Library(AppComponent):
                 column.set_expand(True)
                 column.set_max_width(20)
             self.treeview.append_column(column)
-        # Set the liststore model
-        self.treeview.set_model(self.liststore_create())
+        # Set the model
+        self.treeview.set_model(self.model_create())
         # Set the hexpand property if requested in the configfile
         if not self.app.paths and self.expand:
             self.treeview.set_hexpand(True)
@@ -139,8 +167,7 @@ class Library(AppComponent):
         if self.app.paths and update_image:
             if self.app["thumbnail"].toggled:
                 self.app["thumbnail"].calculate_columns()
-            elif self.app["image"].fit_image and \
-                    not self.app["image"].is_anim:
+            elif self.app["image"].fit_image:
                 self.app["image"].zoom_to(0, self.app["image"].fit_image)
             else:
                 #  Change the toggle state of animation
@@ -161,37 +188,199 @@ class Library(AppComponent):
         # Update info for the current mode
         self.app["statusbar"].update_info()
 
-    def liststore_create(self):
-        """Create the Gtk.ListStore containing information on supported files.
+    def model_create(self):
+        """Create the LibraryModel containing information on supported files.
+
+        Rows are only created once they are shown.
 
         Return:
-            The created liststore containing
+            The created model containing
             [count, filename, filesize, markup_string].
         """
-        liststore = Gtk.ListStore(int, str, str, str)
-        self.files = self.filelist_create()
-        # Remove unsupported files if one isn't in the tags directory
-        if os.getcwd() != self.app["tags"].directory:
-            self.files = [
-                possible_file
-                for possible_file in self.files
-                if is_image(possible_file) or os.path.isdir(possible_file)]
-        # Add all supported files
-        for i, fil in enumerate(self.files):
-            markup_string = fil
-            size = self.filesize[fil]
-            marked_string = ""
-            if os.path.islink(fil):
-                markup_string += "  →  " + os.path.realpath(fil)
-            if os.path.abspath(fil) in self.app["mark"].marked:
-                marked_string = "[*]"
-            if os.path.isdir(fil):
-                markup_string = "<b>" + markup_string + "</b>"
-            if i in self.app["commandline"].search_positions:
-                markup_string = self.markup + markup_string + "</span>"
-            liststore.append([i + 1, markup_string, size, marked_string])
-
-        return liststore
+        if not self._load_listing():
+            self.files = self.filelist_create()
+            self._store_listing()
+        self._set_fixed_height_mode(
+            len(self.files) >= self.fixed_height_threshold)
+        return LibraryModel(self._get_rows, lambda: len(self.files))
+
+    def _set_fixed_height_mode(self, fixed):
+        """Give all rows the same height for huge directories.
+
+        Otherwise the treeview measures every row in the background and
+        therefore creates all of them. Fixed heights require columns of fixed
+        width which are estimated from the longest expected content.
+        """
+        if not fixed:
+            self.treeview.set_fixed_height_mode(False)
+        samples = {"Num": str(len(self.files)), "Size": "999.9M", "M": "[*]"}
+        for column in self.treeview.get_columns():
+            if not fixed:
+                column.set_sizing(Gtk.TreeViewColumnSizing.GROW_ONLY)
+                continue
+            title = column.get_title()
+            if title in samples:
+                width = max(
+                    self.treeview.create_pango_layout(text).get_pixel_size()[0]
+                    for text in [title, samples[title]])
+                column.set_fixed_width(width + 16)
+            column.set_sizing(Gtk.TreeViewColumnSizing.FIXED)
+        if fixed:
+            self.treeview.set_fixed_height_mode(True)
+
+    def _get_listing_key(self, directory):
+        """Return the key a listing of directory is valid for or None."""
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+        return (mtime, self.show_hidden, self.app.settings["GENERAL"]["sort"])
+
+    def _load_listing(self):
+        """Set files and filesize from the cached listing of the directory.
+
+        Only directories whose mtime changed are counted again.
+
+        Return:
+            True if a valid listing was cached.
+        """
+        directory = os.getcwd()
+        if directory not in self.listings:
+            return False
+        key, files, filesize, fileinfo = self.listings[directory]
+        if key is None or key != self._get_listing_key(directory):
+            del self.listings[directory]
+            return False
+        self.listings.move_to_end(directory)
+        self.count_generation += 1
+        self.files = list(files)
+        # Shared with the cache so counts arriving later are cached as well
+        self.filesize = filesize
+        self.fileinfo = fileinfo
+        for fil, (is_directory, target, mtime) in fileinfo.items():
+            if not is_directory:
+                continue
+            try:
+                new_mtime = os.stat(fil).st_mtime_ns
+            except OSError:
+                new_mtime = None
+            if new_mtime != mtime or filesize[fil] == self.pending_marker:
+                filesize[fil] = self._count_async(fil,
+                                                  os.path.join(directory, fil))
+                fileinfo[fil] = (is_directory, target, new_mtime)
+        return True
+
+    def _store_listing(self):
+        directory = os.getcwd()
+        self.listings[directory] = (self._get_listing_key(directory),
+                                    list(self.files), self.filesize,
+                                    self.fileinfo)
+        self.listings.move_to_end(directory)
+        while len(self.listings) > self.listings_size:
+            self.listings.popitem(last=False)
+
+    def _get_rows(self, start, stop):
+        """Return the rows of the files from position start to stop.
+
+        Size and type of files which were not checked when listing the
+        directory are read now.
+        """
+        directory = os.getcwd()
+        rows = []
+        for i in range(start, stop):
+            fil = self.files[i]
+            if fil not in self.fileinfo \
+                    and not self._add_info(fil, directory):
+                # Trusted by its extension but no image or removed meanwhile,
+                # rows cannot be removed while the model is read
+                self.fileinfo[fil] = (False, None, None)
+                self.filesize[fil] = ""
+                GLib.idle_add(self._remove_unsupported, fil)
+            rows.append(self._get_row(i, fil, directory))
+        return rows
+
+    def _remove_unsupported(self, fil):
+        """Remove the row of a file which turned out to be unsupported."""
+        if fil in self.files and self.fileinfo.get(fil) == (False, None, None):
+            self.update_files([fil], [], [])
+        return False  # To stop the idle callback
+
+    def _get_row(self, i, fil, directory):
+        """Return the model row of fil at position i.
+
+        Only information stored when listing the directory is used, no file is
+        accessed.
+        """
+        marked_string = ""
+        if os.path.join(directory, fil) in self.app["mark"].marked:
+            marked_string = "[*]"
+        return [i + 1, self._get_markup(i, fil), self.filesize[fil],
+                marked_string]
+
+    def _get_markup(self, i, fil):
+        """Return the markup string of fil at position i."""
+        is_directory, target, _ = self.fileinfo[fil]
+        markup_string = fil
+        if target is not None:
+            markup_string += "  →  " + target
+        if is_directory:
+            markup_string = "<b>" + markup_string + "</b>"
+        if i in self.app["commandline"].search_positions:
+            markup_string = self.markup + markup_string + "</span>"
+        return markup_string
+
+    def update_files(self, removed, added, modified):
+        """Apply changes of the current directory to the treeview.
+
+        Only the rows of the changed files are touched, the position in the
+        library is kept.
+
+        Args:
+            removed: Names of files that were removed.
+            added: Names of files that were added.
+            modified: Names of files that were modified.
+        """
+        model = self.treeview.get_model()
+        position = self.app.get_pos(False, "lib")
+        current = self.files[position] if self.files else None
+        directory = os.getcwd()
+        forget(os.path.join(directory, fil)
+               for fil in removed + added + modified)
+        # Files which are no longer supported are removed as well
+        for fil in modified:
+            if fil in self.files and not self._add_info(fil, directory):
+                removed.append(fil)
+        for fil in removed:
+            if fil in self.files:
+                i = self.files.index(fil)
+                del self.files[i]
+                self.filesize.pop(fil, None)
+                self.fileinfo.pop(fil, None)
+                model.row_removed(i)
+        added = [fil for fil in sorted(added)
+                 if fil not in self.files
+                 and (self.show_hidden or not fil.startswith("."))
+                 and self._add_info(fil, directory)]
+        if added:
+            # Insert new files where the sort mode puts them, the order of the
+            # other files is kept
+            new_files = set(added)
+            i = 0
+            for fil in self._sort_files(sorted(self.files + added), directory):
+                if fil in new_files:
+                    self.files.insert(i, fil)
+                    model.row_added(i)
+                i += 1
+        for fil in modified:
+            if fil in self.files:
+                model.row_updated(self.files.index(fil))
+        # Numbers of the following rows changed
+        self.reload_names()
+        if current in self.files:
+            position = self.files.index(current)
+        if self.files:
+            position = min(position, len(self.files) - 1)
+            self.treeview.set_cursor(Gtk.TreePath(position), None, False)
 
     def file_select(self, treeview, path, column, close):
         """Show image or open directory for activated file in library.
@@ -232,7 +421,10 @@ class Library(AppComponent):
                     break
                 elif os.path.isfile(f):
                     index += 1
-            self.app.paths, self.app.index = populate(self.files)
+            check_amount = self.app.settings["GENERAL"]["image_check_amount"]
+            self.app.paths, self.app.index = populate(
+                self.files, check_amount=check_amount)
+            self.app.directory_paths = self.app.paths
             if self.app.paths:
                 self.scrollable_treeview.set_hexpand(False)
                 self.app["image"].scrolled_win.show()
@@ -284,7 +476,7 @@ class Library(AppComponent):
         if not search:
             self.app["commandline"].search_positions = []
         # Create model in new directory
-        self.treeview.set_model(self.liststore_create())
+        self.treeview.set_model(self.model_create())
         self.focus(True)
         # Warn if there are no files in the directory
         if not self.files:
@@ -299,17 +491,12 @@ class Library(AppComponent):
                           self.files.index(os.path.basename(last_directory)))
 
     def reload_names(self):
-        """Only reload names of the treeview."""
-        model = self.treeview.get_model()
-        for i, name in enumerate(self.files):
-            markup_string = name
-            if os.path.islink(name):
-                markup_string += "  →  " + os.path.realpath(name)
-            if os.path.isdir(name):
-                markup_string = "<b>" + markup_string + "</b>"
-            if i in self.app["commandline"].search_positions:
-                markup_string = self.markup + markup_string + "</span>"
-            model[i][1] = markup_string
+        """Reload names and marks of the treeview.
+
+        Rows are created again once they are shown.
+        """
+        self.treeview.get_model().invalidate()
+        self.treeview.queue_draw()
 
     def move_pos(self, forward=True, defined_pos=None):
         """Move to a specific position in the library.
@@ -371,8 +558,7 @@ class Library(AppComponent):
             self.width = 100
         self.scrollable_treeview.set_size_request(self.width, 10)
         # Rezoom image
-        if self.app["image"].fit_image and self.app.paths and \
-                not self.app["image"].is_anim:
+        if self.app["image"].fit_image and self.app.paths:
             self.app["image"].zoom_to(0, self.app["image"].fit_image)
 
     def toggle_hidden(self):
@@ -381,40 +567,157 @@ class Library(AppComponent):
         self.reload(".")
 
     def filelist_create(self, directory="."):
-        """Create a filelist from all files in directory.
+        """Create a filelist from all supported files in directory.
+
+        The entries of os.scandir know their type, so every file is stat'ed
+        only once. In directories with more than image_check_amount files,
+        directories and files with image extension are trusted and only read
+        once their row is shown. Other files are sniffed.
 
         Args:
             directory: Directory of which the filelist is created.
+        Return:
+            Sorted list of the names of supported files.
         """
-        # Get data from ls -lh and parse it correctly
-        files = listdir_wrapper(directory, self.show_hidden)
+        # Counts still running for the previous directory are not needed
+        self.count_generation += 1
         self.filesize = {}
-        for fil in files:
-            # Catch broken symbolic links
-            if os.path.islink(fil) and \
-                    not os.path.exists(os.path.realpath(fil)):
-                continue
-            # Number of images in directory as filesize
-            if os.path.isdir(fil):
-                try:
-                    subfiles = listdir_wrapper(fil, self.show_hidden)
-                    # Necessary to keep acceptable speed in library
-                    many = False
-                    if len(subfiles) > self.file_check_amount:
-                        many = True
-                    subfiles = [subfile
-                                for subfile in subfiles[:self.file_check_amount]
-                                if is_image(os.path.join(fil, subfile))]
-                    amount = str(len(subfiles))
-                    if subfiles and many:
-                        amount += "+"
-                    self.filesize[fil] = amount
-                except PermissionError:
-                    self.filesize[fil] = "N/A"
+        self.fileinfo = {}
+        directory = os.path.abspath(directory)
+        with os.scandir(directory) as entries:
+            entries = [entry for entry in entries
+                       if self.show_hidden or not entry.name.startswith(".")]
+        check_amount = self.app.settings["GENERAL"]["image_check_amount"]
+        trust_extensions = 0 <= check_amount < len(entries)
+        files = sorted(entry.name for entry in entries
+                       if trust_extensions and self._is_trusted(entry)
+                       or self._add_info(entry.name, directory, entry,
+                                         trust_extensions))
+        # A new listing sorts by the current state of all files
+        forget(os.path.join(directory, fil) for fil in files)
+        return self._sort_files(files, directory)
+
+    def _sort_files(self, files, directory):
+        """Return the names of files in directory sorted by the sort setting.
+
+        Args:
+            files: Names of files sorted by name.
+            directory: Absolute path of the directory containing files.
+        """
+        sort_mode = self.app.settings["GENERAL"]["sort"]
+        if sort_mode == "name":
+            return files
+        paths = sort_paths([os.path.join(directory, fil) for fil in files],
+                           sort_mode, self._on_metadata_read, directory)
+        return [os.path.basename(path) for path in paths]
+
+    def _on_metadata_read(self, directory):
+        """Sort the files again once metadata needed to sort was indexed."""
+        self.listings.pop(directory, None)
+        if os.getcwd() != directory or not self.treeview.is_focus():
+            return
+        # Stay on the current file
+        current = self.files[self.app.get_pos(False, "lib")] \
+            if self.files else None
+        self.reload(directory)
+        if current in self.files:
+            self.move_pos(True, self.files.index(current))
+
+    def _is_trusted(self, entry):
+        """Return True if entry is shown without reading it.
+
+        Symbolic links are always read as they may be broken.
+        """
+        try:
+            return not entry.is_symlink() \
+                and (entry.is_dir() or has_image_extension(entry.name))
+        except OSError:
+            return False
+
+    def _add_info(self, fil, directory, entry=None, trust_extension=False):
+        """Store size and type of fil if the library shows it.
+
+        The number of images in directories is counted in the background, the
+        size shows the pending marker until then.
+
+        Args:
+            fil: Name of the file.
+            directory: Absolute path of the directory containing fil.
+            entry: os.DirEntry of fil from os.scandir if available.
+            trust_extension: If True do not sniff files with image extension.
+        Return:
+            True if fil is supported. False for unsupported files and broken
+            symbolic links.
+        """
+        path = os.path.join(directory, fil)
+        try:
+            if entry is not None:
+                is_link = entry.is_symlink()
+                stat = entry.stat()
             else:
-                self.filesize[fil] = sizeof_fmt(os.path.getsize(fil))
+                is_link = os.path.islink(path)
+                stat = os.stat(path)
+        except OSError:
+            return False  # Broken symbolic link or removed meanwhile
+        is_directory = S_ISDIR(stat.st_mode)
+        # Every file is supported in the tags directory
+        if not is_directory and directory != self.app["tags"].directory \
+                and not (trust_extension and has_image_extension(fil)) \
+                and get_format_info(path, stat) is None:
+            return False
+        if is_directory:
+            self.filesize[fil] = self._count_async(fil, path)
+        else:
+            self.filesize[fil] = sizeof_fmt(stat.st_size)
+        target = os.path.realpath(path) if is_link else None
+        self.fileinfo[fil] = (is_directory, target, stat.st_mtime_ns)
+        return True
 
-        return files
+    def _count_async(self, fil, path):
+        """Count the images of the directory fil in the background.
+
+        Args:
+            fil: Name of the directory in the library.
+            path: Absolute path to the directory.
+        Return:
+            The pending marker shown until the count arrives.
+        """
+        generation = self.count_generation
+        self._count_pool.apply_async(
+            self._count_images, (path, generation),
+            callback=lambda amount: GLib.idle_add(
+                self._on_counted, fil, amount, generation))
+        return self.pending_marker
+
+    def _count_images(self, directory, generation):
+        """Return the number of images in directory for the size column.
+
+        Run in a worker of the count pool.
+        """
+        if generation != self.count_generation:
+            return None  # Moved on to another directory meanwhile
+        try:
+            subfiles = listdir_wrapper(directory, self.show_hidden)
+            # Necessary to keep acceptable speed in library
+            many = False
+            if len(subfiles) > self.file_check_amount:
+                many = True
+            subfiles = [subfile
+                        for subfile in subfiles[:self.file_check_amount]
+                        if is_image(os.path.join(directory, subfile))]
+            amount = str(len(subfiles))
+            if subfiles and many:
+                amount += "+"
+            return amount
+        except OSError:
+            return "N/A"
+
+    def _on_counted(self, fil, amount, generation):
+        if generation == self.count_generation and amount is not None \
+                and fil in self.filesize:
+            self.filesize[fil] = amount
+            self.treeview.get_model().row_updated(self.files.index(fil))
+        return False  # To stop the idle callback
 
     def scroll(self, direction):
         """Scroll the library viewer and call file_select if necessary.
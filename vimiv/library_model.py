@@ -0,0 +1,163 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Tree model of the library which creates its rows on demand.
+
+A Gtk.ListStore needs every row including size and markup before the library
+can be shown, which takes seconds for directories with hundreds of thousands
+of files. LibraryModel only stores the position of a row in its iters and asks
+the library for the content once the treeview requests it, i.e. for the
+visible rows. Rows are created in chunks so rows scrolled to next are ready,
+and only a limited amount of them is kept.
+"""
+
+from collections import OrderedDict
+
+from gi.repository import GObject, Gtk
+
+
+class LibraryModel(GObject.Object, Gtk.TreeModel):
+    """List model of [count, filename, filesize, markup_string] rows.
+
+    The model does not store the files itself, all changes of the files must be
+    reported using row_updated, row_added and row_removed.
+
+    Attributes:
+        get_rows: Callable of form get_rows(start, stop) returning the rows of
+            the positions start to stop.
+        n_rows: Callable returning the amount of rows.
+        margin: Amount of rows created together with a requested row.
+        cache_size: Maximum amount of rows kept.
+        rows: OrderedDict of created rows, rows[position] = row.
+    """
+
+    column_types = [GObject.TYPE_INT, GObject.TYPE_STRING, GObject.TYPE_STRING,
+                    GObject.TYPE_STRING]
+
+    def __init__(self, get_rows, n_rows, margin=64, cache_size=1024):
+        """Create the model.
+
+        Args:
+            get_rows: See the get_rows attribute.
+            n_rows: See the n_rows attribute.
+            margin: See the margin attribute.
+            cache_size: See the cache_size attribute.
+        """
+        GObject.Object.__init__(self)
+        self.get_rows = get_rows
+        self.n_rows = n_rows
+        self.margin = margin
+        self.cache_size = cache_size
+        self.rows = OrderedDict()
+
+    def get_row(self, position):
+        """Return the row at position creating it and its neighbours if needed.
+
+        Args:
+            position: Position of the row.
+        """
+        if position in self.rows:
+            self.rows.move_to_end(position)
+            return self.rows[position]
+        start = position - position % self.margin
+        stop = min(start + self.margin, self.n_rows())
+        for i, row in enumerate(self.get_rows(start, stop), start=start):
+            self.rows[i] = row
+        while len(self.rows) > self.cache_size:
+            self.rows.popitem(last=False)
+        return self.rows[position]
+
+    def invalidate(self):
+        """Drop all rows so they are created again when requested."""
+        self.rows.clear()
+
+    def row_updated(self, position):
+        """Create the row at position again and update the view."""
+        self.rows.pop(position, None)
+        if position >= self.n_rows():
+            return
+        path = Gtk.TreePath([position])
+        self.row_changed(path, self.get_iter(path))
+
+    def row_added(self, position):
+        """Show the row inserted at position."""
+        # Positions of all following rows changed
+        self.invalidate()
+        path = Gtk.TreePath([position])
+        self.row_inserted(path, self.get_iter(path))
+
+    def row_removed(self, position):
+        """Remove the row that was at position from the view."""
+        self.invalidate()
+        self.row_deleted(Gtk.TreePath([position]))
+
+    def _create_iter(self, position):
+        if not 0 <= position < self.n_rows():
+            return (False, None)
+        treeiter = Gtk.TreeIter()
+        # Position 0 would be a NULL pointer
+        treeiter.user_data = position + 1
+        return (True, treeiter)
+
+    def do_get_flags(self):
+        """Return the flags of the model, it is a flat list."""
+        return Gtk.TreeModelFlags.LIST_ONLY
+
+    def do_get_n_columns(self):
+        """Return the amount of columns."""
+        return len(self.column_types)
+
+    def do_get_column_type(self, column):
+        """Return the type of column."""
+        return self.column_types[column]
+
+    def do_get_iter(self, path):
+        """Return an iter pointing to path."""
+        indices = path.get_indices()
+        if len(indices) != 1:
+            return (False, None)
+        return self._create_iter(indices[0])
+
+    def do_get_path(self, treeiter):
+        """Return the path of the row treeiter points to."""
+        return Gtk.TreePath([treeiter.user_data - 1])
+
+    def do_get_value(self, treeiter, column):
+        """Return the value of column in the row treeiter points to."""
+        return self.get_row(treeiter.user_data - 1)[column]
+
+    def do_iter_next(self, treeiter):
+        """Move treeiter to the next row."""
+        position = treeiter.user_data
+        if position >= self.n_rows():
+            return False
+        treeiter.user_data = position + 1
+        return True
+
+    def do_iter_previous(self, treeiter):
+        """Move treeiter to the previous row."""
+        position = treeiter.user_data - 1
+        if position <= 0:
+            return False
+        treeiter.user_data = position
+        return True
+
+    def do_iter_has_child(self, treeiter):
+        """Return False as rows have no children."""
+        return False
+
+    def do_iter_n_children(self, treeiter):
+        """Return the amount of rows for the root, 0 otherwise."""
+        return self.n_rows() if treeiter is None else 0
+
+    def do_iter_children(self, parent):
+        """Return an iter pointing to the first row."""
+        return self.do_iter_nth_child(parent, 0)
+
+    def do_iter_nth_child(self, parent, n):
+        """Return an iter pointing to row n of the root."""
+        if parent is not None:
+            return (False, None)
+        return self._create_iter(n)
+
+    def do_iter_parent(self, child):
+        """Return no iter as rows have no parent."""
+        return (False, None)
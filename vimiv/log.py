@@ -1,6 +1,7 @@
 # vim: ft=python fileencoding=utf-8 sw=4 et sts=4
 """Class to handle log file for vimiv."""
 
+import json
 import os
 import sys
 import time
@@ -79,6 +80,18 @@ class Log(AppComponent):
         with open(self.filename, "a") as f:
             f.write(formatted_message)
 
+    def write_records(self, header, records):
+        """Write records to the log file as JSON, one per line.
+
+        Args:
+            header: Title of the records, gets surrounded in [].
+            records: Iterable of JSON serializable records.
+        """
+        with open(self.filename, "a") as f:
+            for record in records:
+                f.write("%-15s %s\n" % ("[" + header + "]",
+                                        json.dumps(record, sort_keys=True)))
+
     def write_separator(self):
         """Write a neat 80 * # separator to the log file."""
         with open(self.filename, "a") as f:
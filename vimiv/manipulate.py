@@ -181,9 +181,12 @@ class Manipulate(AppComponent):
             cwise = cwise % 4
             # Rotate the image shown
             if self.app.paths[self.app.index] in images:
-                self.app["image"].pixbuf_original = \
-                    self.app["image"].pixbuf_original.rotate_simple(
-                        (90 * cwise))
+                if self.app["image"].pyramid:
+                    self.app["image"].pyramid.rotate(cwise)
+                else:
+                    self.app["image"].pixbuf_original = \
+                        self.app["image"].pixbuf_original.rotate_simple(
+                            (90 * cwise))
                 if self.app["image"].fit_image:
                     self.app["image"].zoom_percent = \
                         self.app["image"].get_zoom_percent_to_fit(
@@ -245,8 +248,11 @@ class Manipulate(AppComponent):
             images = self.get_manipulated_images("Flipped")
             # Flip the image shown
             if self.app.paths[self.app.index] in images:
-                self.app["image"].pixbuf_original = \
-                    self.app["image"].pixbuf_original.flip(horizontal)
+                if self.app["image"].pyramid:
+                    self.app["image"].pyramid.flip(horizontal)
+                else:
+                    self.app["image"].pixbuf_original = \
+                        self.app["image"].pixbuf_original.flip(horizontal)
                 self.app["image"].update(False)
             if flip_file:
                 for fil in images:
@@ -275,6 +281,12 @@ class Manipulate(AppComponent):
             message = "No image rotated. Tried using %s." % (method)
         self.app["statusbar"].message(message, "info")
 
+    def release(self):
+        """Release the images opened for manipulation."""
+        if not self.scrolled_win.is_visible():
+            self.pil_image = Image
+            self.pil_thumb = Image
+
     def toggle(self):
         """Toggle the manipulation bar."""
         if self.scrolled_win.is_visible():
@@ -345,7 +357,8 @@ class Manipulate(AppComponent):
         else:
             pixbuf = GdkPixbuf.Pixbuf.new_from_bytes(
                 g_data, GdkPixbuf.Colorspace.RGB, False, 8, w, h, 3 * w)
-        # Show the edited pixbuf
+        # Show the edited pixbuf, it replaces any pyramid of huge images
+        self.app["image"].pyramid = None
         self.app["image"].pixbuf_original = pixbuf
         self.app["image"].update()
         self.app["image"].zoom_to(0)
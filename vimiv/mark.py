@@ -99,11 +99,7 @@ class Mark(AppComponent):
         """Reload all information which contains marks."""
         # Update lib
         if self.app["library"].grid.is_visible():
-            model = self.app["library"].treeview.get_model()
-            for i, name in enumerate(self.app["library"].files):
-                model[i][3] = "[*]" \
-                    if os.path.abspath(name) in self.marked \
-                    else ""
+            self.app["library"].reload_names()
         # Reload thumb names
         if self.app["thumbnail"].toggled:
             reload_list = self.app.paths if reload_all else current
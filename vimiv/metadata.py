@@ -0,0 +1,268 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Persistent index of image metadata.
+
+Dimensions, format, EXIF orientation, capture date, camera model and file size
+of images are stored in a sqlite database in $XDG_CACHE_HOME/vimiv. Entries
+are keyed by path, mtime and size so they are read again once the file
+changes. Features like formatting, autorotation, sorting and the statusbar
+query the index instead of opening files with PIL again.
+
+Lists of paths are indexed by a background indexer in a thread pool, the
+results are written in one transaction per chunk.
+"""
+
+import collections
+import os
+import sqlite3
+from multiprocessing.pool import ThreadPool as Pool
+from threading import Lock
+
+from gi.repository import GLib
+from PIL import Image
+
+from vimiv.format_cache import get_format_info
+from vimiv.image_header import read_header
+
+Metadata = collections.namedtuple(
+    "Metadata",
+    ["width", "height", "format", "orientation", "date", "camera", "size"])
+
+_TAG_ORIENTATION = 274
+_TAG_DATETIME = 306
+_TAG_DATETIME_ORIGINAL = 36867
+_TAG_MODEL = 272
+
+_COLUMNS = ["path", "mtime", "size", "width", "height", "format",
+            "orientation", "date", "camera"]
+
+# _cache[path] = (mtime, size, Metadata or None)
+_cache = {}
+_connection = None
+_lock = Lock()
+_workers = os.cpu_count() or 1
+_pool = Pool(_workers)
+
+
+def get_database_path():
+    """Return the path to the sqlite database of the index."""
+    return os.path.join(GLib.get_user_cache_dir(), "vimiv", "metadata.db")
+
+
+def get_metadata(path):
+    """Return the metadata of path from the index.
+
+    The file is only read if it is not in the index or changed.
+
+    Args:
+        path: Path to the file.
+    Return:
+        Metadata of path or None if it is not a supported image.
+    """
+    return get_metadata_many([path])[path]
+
+
+def get_cached_metadata(path):
+    """Return the metadata of path if the indexer already stored it in memory.
+
+    Neither the file nor the database are accessed, so this never blocks the
+    main loop while the indexer runs. Changes of the file are only seen once
+    it was indexed again.
+
+    Args:
+        path: Path to the file.
+    Return:
+        Metadata of path or None if it is not a supported image.
+    Raise:
+        KeyError if path was not indexed yet.
+    """
+    return _cache[os.path.abspath(os.path.expanduser(path))][2]
+
+
+def get_metadata_many(paths):
+    """Return the metadata of a list of paths from the index.
+
+    Files missing in the index are read and added to it in one transaction.
+
+    Args:
+        paths: List of paths.
+    Return:
+        Dictionary of metadata[path] = Metadata or None.
+    """
+    metadata = {}
+    missing = {}
+    for path in paths:
+        abspath = os.path.abspath(os.path.expanduser(path))
+        try:
+            stat = os.stat(abspath)
+        except OSError:
+            _cache.pop(abspath, None)
+            metadata[path] = None
+            continue
+        if abspath in _cache:
+            mtime, size, data = _cache[abspath]
+            if mtime == stat.st_mtime and size == stat.st_size:
+                metadata[path] = data
+                continue
+        missing[abspath] = (path, stat)
+    if not missing:
+        return metadata
+    # Look the remaining paths up in the database
+    rows = _select(list(missing))
+    new_rows = []
+    for abspath, (path, stat) in missing.items():
+        row = rows.get(abspath)
+        if row is None or row[1] != stat.st_mtime or row[2] != stat.st_size:
+            row = (abspath, stat.st_mtime, stat.st_size) + _read(abspath)
+            new_rows.append(row)
+        data = Metadata(*row[3:], size=row[2]) if row[5] else None
+        _cache[abspath] = (stat.st_mtime, stat.st_size, data)
+        metadata[path] = data
+    _insert(new_rows)
+    return metadata
+
+
+def index_async(paths, callback=None, *args, error_callback=None):
+    """Add a list of paths to the index in the background.
+
+    The paths are split into one chunk per worker of the pool so files are
+    read in parallel.
+
+    Args:
+        paths: List of paths to index.
+        callback: Callable of form callback(metadata, *args) called from the
+            main loop once all chunks are done. See get_metadata_many for
+            metadata.
+        args: Any additional arguments that are passed to callback.
+        error_callback: Callable of form error_callback(exception) called from
+            the main loop instead of callback if indexing failed, e.g. as the
+            database is locked.
+    """
+    # The list may still grow while it is indexed
+    paths = list(paths)
+    chunk_size = max(1, -(-len(paths) // _workers))
+    chunks = [paths[i:i + chunk_size]
+              for i in range(0, len(paths), chunk_size)] or [[]]
+    metadata = {}
+    state = {"pending": len(chunks), "failed": False}
+    lock = Lock()
+
+    def _do_callback(chunk_metadata):
+        with lock:
+            metadata.update(chunk_metadata)
+            state["pending"] -= 1
+            done = not state["pending"] and not state["failed"]
+        if done and callback is not None:
+            GLib.idle_add(callback, metadata, *args)
+
+    def _do_error_callback(exception):
+        with lock:
+            first = not state["failed"]
+            state["failed"] = True
+        if first and error_callback is not None:
+            GLib.idle_add(error_callback, exception)
+
+    for chunk in chunks:
+        _pool.apply_async(get_metadata_many, (chunk,), callback=_do_callback,
+                          error_callback=_do_error_callback)
+
+
+def clear():
+    """Remove all entries from the index."""
+    _cache.clear()
+    with _lock:
+        _connect().execute("DELETE FROM metadata")
+        _connection.commit()
+
+
+def connect(database=None):
+    """Open the database of the index.
+
+    Called automatically on first use of the index.
+
+    Args:
+        database: Path to the database, defaults to get_database_path().
+    """
+    global _connection  # pylint: disable=global-statement
+    database = database or get_database_path()
+    os.makedirs(os.path.dirname(database), exist_ok=True)
+    # Connection is shared by the indexer threads, access is locked
+    connection = sqlite3.connect(database, check_same_thread=False)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS metadata (path TEXT PRIMARY KEY, "
+        "mtime REAL, size INTEGER, width INTEGER, height INTEGER, "
+        "format TEXT, orientation INTEGER, date TEXT, camera TEXT)")
+    connection.commit()
+    if _connection is not None:
+        _connection.close()
+    _cache.clear()
+    _connection = connection
+
+
+def close():
+    """Close the database, it is opened again on the next use."""
+    global _connection  # pylint: disable=global-statement
+    with _lock:
+        if _connection is not None:
+            _connection.close()
+        _connection = None
+
+
+def _connect():
+    if _connection is None:
+        connect()
+    return _connection
+
+
+def _select(paths):
+    rows = {}
+    # Stay below the limit of variables sqlite supports in one query
+    with _lock:
+        connection = _connect()
+        for i in range(0, len(paths), 500):
+            chunk = paths[i:i + 500]
+            query = "SELECT %s FROM metadata WHERE path IN (%s)" \
+                % (", ".join(_COLUMNS), ", ".join("?" * len(chunk)))
+            for row in connection.execute(query, chunk):
+                rows[row[0]] = row
+    return rows
+
+
+def _insert(rows):
+    if not rows:
+        return
+    with _lock:
+        connection = _connect()
+        connection.executemany(
+            "INSERT OR REPLACE INTO metadata "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        connection.commit()
+
+
+def _read(path):
+    """Read the metadata of path from the file.
+
+    Return:
+        Tuple of (width, height, format, orientation, date, camera).
+    """
+    info = get_format_info(path)
+    if info is None:
+        return (None, None, None, None, None, None)
+    width, height, orientation = info.width, info.height, 1
+    header = read_header(path)
+    if header:
+        width, height, orientation = header
+    date = camera = None
+    try:
+        with Image.open(path) as im:
+            # Only formats with EXIF support provide _getexif
+            exif = im._getexif() if hasattr(im, "_getexif") else None
+    except (AttributeError, IndexError, KeyError, OSError, SyntaxError,
+            TypeError, ValueError):
+        exif = None
+    if exif:
+        orientation = exif.get(_TAG_ORIENTATION, orientation)
+        date = exif.get(_TAG_DATETIME_ORIGINAL, exif.get(_TAG_DATETIME))
+        camera = exif.get(_TAG_MODEL)
+        camera = camera.strip("\x00 ") if isinstance(camera, str) else None
+        date = date if isinstance(date, str) else None
+    return (width, height, info.name, orientation, date, camera)
@@ -0,0 +1,101 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Record how long the stages of displaying an image take.
+
+Every stage, e.g. stat, decode, scale and set_from_pixbuf, is timed and stored
+in a ring buffer. The median and 95th percentile of each stage tell whether
+disk, decoder, scaling or GTK is responsible for slow rendering.
+"""
+
+import collections
+import contextlib
+import time
+
+from vimiv.app_component import AppComponent
+from vimiv.log import Log
+from vimiv.statusbar import Statusbar
+
+
+def percentile(values, percent):
+    """Return the percentile of a list of values using the nearest rank.
+
+    Args:
+        values: Sorted list of values.
+        percent: Percentile to return between 0 and 100.
+    """
+    index = round(percent / 100 * (len(values) - 1))
+    return values[index]
+
+
+class Perf(AppComponent):
+    """Ring buffer of render timings.
+
+    Attributes:
+        records: collections.deque of the latest timings. Each record is a
+            dictionary containing at least stage and ms.
+        stages: Names of the stages in the order they are shown.
+    """
+
+    stages = ["stat", "decode", "scale", "set_from_pixbuf"]
+
+    def __init__(self, app, size=1000):
+        """Create the ring buffer.
+
+        Args:
+            app: The main vimiv application to interact with.
+            size: Maximum amount of records kept.
+        """
+        super().__init__(app)
+        self.records = collections.deque(maxlen=size)
+
+    @contextlib.contextmanager
+    def measure(self, stage, **info):
+        """Time the code run in the context as stage.
+
+        Args:
+            stage: Name of the stage.
+            info: Additional information stored in the record, e.g. format.
+        """
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            info["stage"] = stage
+            info["ms"] = round((time.perf_counter() - start) * 1000, 3)
+            self.records.append(info)
+
+    def get_stats(self):
+        """Return count, median and 95th percentile of each stage.
+
+        Return:
+            Dictionary of stats[stage] = (count, p50, p95) in ms.
+        """
+        timings = collections.defaultdict(list)
+        for record in self.records:
+            timings[record["stage"]].append(record["ms"])
+        stats = {}
+        for stage, values in timings.items():
+            values.sort()
+            stats[stage] = (len(values), percentile(values, 50),
+                            percentile(values, 95))
+        return stats
+
+    def show(self):
+        """Show the stats of all stages in the statusbar."""
+        stats = self.get_stats()
+        if not stats:
+            self.get_component(Statusbar).message("No timings recorded",
+                                                  "info")
+            return
+        stages = [stage for stage in self.stages if stage in stats] \
+            + sorted(stage for stage in stats if stage not in self.stages)
+        message = "  ".join(
+            "%s: %.1f/%.1f ms (%d)" % (stage, stats[stage][1], stats[stage][2],
+                                       stats[stage][0])
+            for stage in stages)
+        self.get_component(Statusbar).message("p50/p95 " + message, "info")
+
+    def dump(self):
+        """Write all records as JSON lines to the log file."""
+        self.get_component(Log).write_records("perf", self.records)
+        self.get_component(Statusbar).message(
+            "Wrote %d timings to the log" % (len(self.records)), "info")
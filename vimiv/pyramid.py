@@ -0,0 +1,220 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Multi-resolution image pyramid for very large images.
+
+The pyramid provides power-of-two downsampled versions of an image. Levels are
+only decoded once they are requested and can optionally be cached on disk so
+reopening a huge image does not require decoding it at full resolution again.
+Cached levels are written in the background, the least recently used ones are
+removed once the cache grows beyond its maximum size.
+"""
+
+import hashlib
+import os
+import tempfile
+from math import floor, log2
+from multiprocessing.pool import ThreadPool as Pool
+
+from gi._error import GError
+from gi.repository import GdkPixbuf, GLib
+
+
+class ImagePyramid:
+    """Power-of-two image pyramid with lazily loaded levels.
+
+    Level 0 is the original image, level n is downscaled by a factor of 2**n.
+
+    Attributes:
+        path: Path to the original image.
+        width: Width of the original image as displayed.
+        height: Height of the original image as displayed.
+        max_level: Coarsest level of the pyramid.
+        levels: Dictionary of loaded levels, levels[n] = GdkPixbuf.Pixbuf.
+        transformations: List of rotations and flips applied to the displayed
+            image which have to be applied to newly loaded levels as well.
+        cache_dir: Directory in which levels are cached. Empty to disable the
+            disk cache.
+    """
+
+    min_size = 256
+    # Maximum size of all cached levels in bytes
+    cache_size = 512 * 2**20
+    _pool = Pool(1)
+
+    def __init__(self, path, width, height, use_cache=True):
+        """Create the pyramid without loading any level.
+
+        Args:
+            path: Path to the original image.
+            width: Width of the original image.
+            height: Height of the original image.
+            use_cache: If True cache downsampled levels on disk.
+        """
+        self.path = path
+        self.width = width
+        self.height = height
+        self.max_level = 0
+        while max(width, height) >> (self.max_level + 1) >= self.min_size:
+            self.max_level += 1
+        self.levels = {}
+        self.transformations = []
+        self.cache_dir = ""
+        if use_cache:
+            self.cache_dir = os.path.join(GLib.get_user_cache_dir(), "vimiv",
+                                          "pyramid")
+            os.makedirs(self.cache_dir, 0o700, exist_ok=True)
+
+    def get_level(self, zoom):
+        """Return the coarsest level which is still sharp at zoom.
+
+        Args:
+            zoom: Zoom percentage compared to the original size.
+        """
+        if zoom >= 1:
+            return 0
+        return min(floor(log2(1 / zoom)), self.max_level)
+
+    def get_level_size(self, level):
+        """Return the size of level as tuple."""
+        return max(1, self.width >> level), max(1, self.height >> level)
+
+    def get_pixbuf(self, zoom):
+        """Return the pixbuf of the level closest to zoom loading it if needed.
+
+        Finer levels are released once a coarser one is loaded so at most one
+        large level is kept in memory.
+
+        Args:
+            zoom: Zoom percentage compared to the original size.
+        """
+        level = self.get_level(zoom)
+        if level not in self.levels:
+            self.levels[level] = self._load_level(level)
+            for finer in [lvl for lvl in self.levels if lvl < level]:
+                del self.levels[finer]
+        return self.levels[level]
+
+    def rotate(self, cwise):
+        """Rotate all loaded and future levels by 90 * cwise degrees."""
+        if cwise % 2:
+            self.width, self.height = self.height, self.width
+        self._transform("rotate", cwise)
+
+    def flip(self, horizontal):
+        """Flip all loaded and future levels."""
+        self._transform("flip", horizontal)
+
+    def _transform(self, name, value):
+        self.transformations.append((name, value))
+        for level, pixbuf in self.levels.items():
+            self.levels[level] = self._apply_transformation(pixbuf, name, value)
+
+    @staticmethod
+    def _apply_transformation(pixbuf, name, value):
+        if name == "rotate":
+            return pixbuf.rotate_simple(90 * value)
+        return pixbuf.flip(value)
+
+    def _load_level(self, level):
+        # Deriving from a finer level in memory is cheaper than decoding
+        finer = [lvl for lvl in self.levels if lvl < level]
+        if finer:
+            source = self.levels[max(finer)]
+            factor = 2 ** (level - max(finer))
+            return source.scale_simple(
+                max(1, source.get_width() // factor),
+                max(1, source.get_height() // factor),
+                GdkPixbuf.InterpType.BILINEAR)
+        pixbuf = self._read_level(level)
+        for name, value in self.transformations:
+            pixbuf = self._apply_transformation(pixbuf, name, value)
+        return pixbuf
+
+    def _read_level(self, level):
+        if level == 0:
+            return GdkPixbuf.Pixbuf.new_from_file(self.path)
+        cache_path = self._get_cache_path(level)
+        if cache_path and os.path.isfile(cache_path):
+            try:
+                pixbuf = GdkPixbuf.Pixbuf.new_from_file(cache_path)
+                # Mark the level as recently used
+                os.utime(cache_path)
+                return pixbuf
+            except (GError, OSError):
+                pass  # Broken cache file, decode again
+        # Decode untransformed, the transformations are applied afterwards
+        width, height = self.get_level_size(level)
+        if self._swapped():
+            width, height = height, width
+        pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(self.path, width,
+                                                         height, False)
+        if cache_path:
+            self._write_cache(pixbuf, cache_path)
+        return pixbuf
+
+    def _swapped(self):
+        rotations = sum(value for name, value in self.transformations
+                        if name == "rotate")
+        return rotations % 2
+
+    def _get_cache_path(self, level):
+        if not self.cache_dir:
+            return ""
+        try:
+            mtime = int(os.path.getmtime(self.path))
+        except OSError:
+            return ""
+        key = "file://%s:%d" % (os.path.abspath(self.path), mtime)
+        name = hashlib.md5(bytes(key, "UTF-8")).hexdigest()
+        return os.path.join(self.cache_dir, "%s_%d.png" % (name, level))
+
+    def _write_cache(self, pixbuf, cache_path):
+        # Encoding huge levels takes long, levels are never changed in place
+        self._pool.apply_async(self._do_write_cache,
+                               (pixbuf, cache_path, self.cache_dir,
+                                self.cache_size))
+
+    @staticmethod
+    def _do_write_cache(pixbuf, cache_path, cache_dir, cache_size):
+        # Move a temporary file into place as done for thumbnails to avoid
+        # reading half written files
+        handle, tmp_filename = tempfile.mkstemp(dir=cache_dir)
+        os.close(handle)
+        try:
+            pixbuf.savev(tmp_filename, "png", [], [])
+            os.replace(tmp_filename, cache_path)
+        except (GError, OSError):
+            os.remove(tmp_filename)
+            return
+        clean_cache(cache_dir, cache_size)
+
+
+def clean_cache(cache_dir, cache_size):
+    """Remove the least recently used levels until the cache fits its size.
+
+    Args:
+        cache_dir: Directory in which levels are cached.
+        cache_size: Maximum size of all cached levels in bytes.
+    """
+    entries = []
+    try:
+        with os.scandir(cache_dir) as scanned:
+            for entry in scanned:
+                # Temporary files are still being written
+                if not entry.name.endswith(".png"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # Removed meanwhile
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except OSError:
+        return
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= cache_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
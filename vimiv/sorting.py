@@ -0,0 +1,170 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Sort lists of paths by name, modification time, size or image metadata.
+
+The sort key of every path is computed once before sorting. Modification time
+and size are taken from a single os.stat per path, capture date and dimensions
+from the metadata the indexer already read. Paths missing in the index are
+indexed in the background and sorted as if they had no metadata until then.
+Comparisons never access any file.
+
+Natural keys and the stat results are cached, so re-sorting a list only stats
+new paths. Paths of changed files must be dropped from the cache using forget.
+"""
+
+import os
+import re
+
+from vimiv.metadata import get_cached_metadata, index_async
+
+SORT_MODES = ["name", "natural", "mtime", "size", "date", "dimensions"]
+
+_DIGITS = re.compile(r"\d+")
+
+# Natural keys of paths sorted before, re-sorting only compares strings
+_natural_keys = {}
+# _stat_keys[path] = (mtime, size), (-1, -1) for removed files
+_stat_keys = {}
+_MAX_CACHED = 200000
+
+
+def _pad(match):
+    return match.group().zfill(20)
+
+
+def natural_key(path):
+    """Return a key to sort path naturally, e.g. image2 before image10.
+
+    Numbers are padded with zeros so the keys are plain strings which compare
+    much faster than lists.
+    """
+    try:
+        return _natural_keys[path]
+    except KeyError:
+        if len(_natural_keys) > _MAX_CACHED:
+            _natural_keys.clear()
+        key = _natural_keys[path] = _DIGITS.sub(_pad, path.lower())
+        return key
+
+
+def forget(paths):
+    """Drop cached information of changed paths.
+
+    Args:
+        paths: Iterable of paths which were modified, added or removed.
+    """
+    for path in paths:
+        _stat_keys.pop(path, None)
+
+
+def clear():
+    """Drop all cached information."""
+    _natural_keys.clear()
+    _stat_keys.clear()
+
+
+def _stat_key(path):
+    try:
+        return _stat_keys[path]
+    except KeyError:
+        if len(_stat_keys) > _MAX_CACHED:
+            _stat_keys.clear()
+        try:
+            stat = os.stat(path)
+            key = (stat.st_mtime, stat.st_size)
+        except OSError:
+            key = (-1, -1)  # Removed files go first
+        _stat_keys[path] = key
+        return key
+
+
+def sort_keys(paths, mode, callback=None, *args):
+    """Return the sort keys of a list of paths.
+
+    Paths with equal or missing information are ordered naturally by name.
+
+    Args:
+        paths: List of paths.
+        mode: One of SORT_MODES.
+        callback: Callable of form callback(*args) called from the main loop
+            once paths missing in the metadata index were indexed, e.g. to
+            sort again.
+        args: Any additional arguments that are passed to callback.
+    Return:
+        List of keys, keys[i] belongs to paths[i].
+    """
+    if mode not in SORT_MODES:
+        raise ValueError("Unknown sort mode %s" % (mode))
+    if mode == "name":
+        return paths
+    names = [natural_key(path) for path in paths]
+    if mode == "natural":
+        return names
+    if mode in ["mtime", "size"]:
+        index = 0 if mode == "mtime" else 1
+        primary = [_stat_key(path)[index] for path in paths]
+        return list(zip(primary, names))
+    primary = []
+    missing = []
+    for path in paths:
+        try:
+            data = get_cached_metadata(path)
+        except KeyError:
+            data = None
+            missing.append(path)
+        if mode == "date":
+            primary.append(data.date if data and data.date else "")
+        else:
+            primary.append(data.width * data.height if data and data.width
+                           else -1)
+    if missing:
+        index_async(missing, _on_metadata_read, callback, *args)
+    return list(zip(primary, names))
+
+
+def _on_metadata_read(metadata, callback, *args):
+    # Removed files are never indexed, only sort again if anything was found
+    if callback is not None and any(metadata.values()):
+        callback(*args)
+
+
+def sort_paths(paths, mode="name", callback=None, *args):
+    """Return a sorted copy of a list of paths.
+
+    Args:
+        paths: List of paths.
+        mode: One of SORT_MODES.
+        callback: Called once missing metadata was indexed, see sort_keys.
+        args: Any additional arguments that are passed to callback.
+    Return:
+        The sorted list.
+    """
+    if mode == "name":
+        return sorted(paths)
+    keys = sort_keys(paths, mode, callback, *args)
+    order = sorted(range(len(paths)), key=keys.__getitem__)
+    return [paths[i] for i in order]
+
+
+def insert_paths(paths, added, mode="name", callback=None, *args):
+    """Return a list of paths with added paths inserted by a sort mode.
+
+    If paths are not sorted by mode, e.g. as they were shuffled, the added
+    paths are appended. The sort keys are computed only once.
+
+    Args:
+        paths: List of paths.
+        added: List of paths to add.
+        mode: One of SORT_MODES.
+        callback: Called once missing metadata was indexed, see sort_keys.
+        args: Any additional arguments that are passed to callback.
+    Return:
+        The new list.
+    """
+    combined = paths + added
+    if not added:
+        return combined
+    keys = sort_keys(combined, mode, callback, *args)
+    if any(keys[i] > keys[i + 1] for i in range(len(paths) - 1)):
+        return combined
+    order = sorted(range(len(combined)), key=keys.__getitem__)
+    return [combined[i] for i in order]
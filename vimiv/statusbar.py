@@ -7,6 +7,7 @@ from gi.repository import Gdk, GLib, Gtk
 
 from vimiv.app_component import AppComponent
 from vimiv.commandline import CommandLine
+from vimiv.metadata import get_cached_metadata, index_async
 
 
 class Statusbar(AppComponent):
@@ -22,6 +23,7 @@ class Statusbar(AppComponent):
         size: Height of the statusbar.
         lock: If True do not update any information.
         was_hidden: If True the statusbar was hidden before an error message.
+        indexing: Set of paths indexed in the background for their dimensions.
         bar: Gtk.Grid containing all widgets.
         left_label: Gtk.Label containing position, name and zoom.
         right_label: Gtk.Label containing mode and prefixed numbers.
@@ -43,6 +45,7 @@ class Statusbar(AppComponent):
         self.size = 0
         self.lock = False
         self.was_hidden = False
+        self.indexing = set()
 
         # Statusbar on the bottom
         self.bar = Gtk.Grid()
@@ -144,9 +147,10 @@ class Statusbar(AppComponent):
         # Position, name and thumbnail size in thumb mode
         elif "THUMBNAIL" in mode:
             pos = self.app.get_pos()
-            name = os.path.basename(self.app.get_pos(True))
-            message = "{0}/{1}  {2}  {3}".format(
-                pos + 1, len(self.app.paths), name,
+            path = self.app.get_pos(True)
+            message = "{0}  {1}  {2}{3}".format(
+                self.get_position(pos), os.path.basename(path),
+                self.get_dimensions(path),
                 self.app["thumbnail"].get_zoom_level())
 
             self.left_label.set_text(message)
@@ -155,14 +159,64 @@ class Statusbar(AppComponent):
             # TODO useful information in the commandline
             self.left_label.set_text("")
         elif self.app.paths:
-            name = os.path.basename(self.app.paths[self.app.index])
-            message = "{0}/{1}  {2}  [{3:.0f}%]".format(
-                self.app.index + 1, len(self.app.paths), name,
+            path = self.app.paths[self.app.index]
+            message = "{0}  {1}  {2}[{3:.0f}%]".format(
+                self.get_position(self.app.index), os.path.basename(path),
+                self.get_dimensions(path),
                 self.app["image"].zoom_percent * 100)
             self.left_label.set_text(message)
         else:
             self.left_label.set_text("No open images")
 
+    def get_position(self, pos):
+        """Return the position in the imagelist for display.
+
+        Return:
+            String of the form "POS/AMOUNT". While the imagelist is still
+            growing in a scan the amount is unknown, "POS/… scanning".
+        """
+        if self.app.scanning:
+            return "{0}/… scanning".format(pos + 1)
+        return "{0}/{1}".format(pos + 1, len(self.app.paths))
+
+    def get_dimensions(self, path):
+        """Return the dimensions of path from the metadata index for display.
+
+        Only metadata in memory is used. Paths which were not indexed yet are
+        indexed in the background and the statusbar is updated once done.
+
+        Return:
+            String of the form "WIDTHxHEIGHT  " or "" if they are unknown.
+        """
+        if not path:
+            return ""
+        try:
+            metadata = get_cached_metadata(path)
+        except KeyError:
+            if path not in self.indexing:
+                self.index([path])
+            return ""
+        if not metadata or metadata.width is None:
+            return ""
+        return "{0}x{1}  ".format(metadata.width, metadata.height)
+
+    def index(self, paths):
+        """Index paths in the background and update the dimensions once done.
+
+        Args:
+            paths: List of paths which are new or changed.
+        """
+        self.indexing.update(paths)
+        index_async(paths, self._on_metadata_read, paths)
+
+    def _on_metadata_read(self, metadata, paths):
+        self.indexing.difference_update(paths)
+        # Files removed meanwhile are not indexed, do not try again, and
+        # messages stay until their timer removes them
+        if any(metadata.get(path) for path in paths) and not self.errors:
+            self.update_info()
+        return False  # To stop the idle callback
+
     def set_center_status(self, mode):
         """Set the centre of the statusbar depending on mode."""
         mark = "[*]" \
@@ -212,8 +266,7 @@ class Statusbar(AppComponent):
         self.hidden = not self.hidden
         # Resize the image if necessary
         if self.app["image"].fit_image and self.app.paths and \
-                not self.app["thumbnail"].toggled and \
-                not self.app["image"].is_anim:
+                not self.app["thumbnail"].toggled:
             self.app["image"].zoom_to(0, self.app["image"].fit_image)
 
     def set_separator_height(self):
@@ -98,7 +98,9 @@ class TagHandler(AppComponent):
         tagged_images = self.read(tagname)
         # Populate filelist
         self.app.paths = []
-        self.app.paths = populate(tagged_images)[0]
+        check_amount = self.app.settings["GENERAL"]["image_check_amount"]
+        self.app.paths = populate(tagged_images,
+                                  check_amount=check_amount)[0]
         if self.app.paths:
             self.app["image"].scrolled_win.show()
             self.app["library"].scrollable_treeview.set_hexpand(False)
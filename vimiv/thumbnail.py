@@ -9,6 +9,7 @@ from gi.repository import GdkPixbuf, GLib, Gtk
 from vimiv.app_component import AppComponent
 from vimiv.fileactions import populate
 from vimiv.library import Library
+from vimiv.metadata import index_async
 from vimiv.thumbnail_manager import ThumbnailManager
 
 
@@ -25,6 +26,8 @@ class Thumbnail(AppComponent):
         timer_id: ID of the currently running GLib.Timeout.
             creation failed.
         elements: List containing names of current thumbnail-files.
+        generation: Increased whenever the liststore is filled again.
+            Thumbnails created for an older generation are dropped.
         markup: Markup string used to highlight search results.
         liststore: Gtk.ListStore containing thumbnail pixbufs and names.
         iconview: Gtk.IconView to display thumbnails.
@@ -47,6 +50,7 @@ class Thumbnail(AppComponent):
         self.padding = general["thumb_padding"]
         self.timer_id = GLib.Timeout
         self.elements = []
+        self.generation = 0
         self.markup = self.get_component(Library).markup.replace("fore", "back")
 
         zoom_level = general["default_thumbsize"]
@@ -104,10 +108,12 @@ class Thumbnail(AppComponent):
                 # Re-expand the library if there is no image and the setting
                 # applies
                 if self.app["library"].expand and \
+                        not self.app["image"].released and \
                         self.app["image"].pixbuf_original.get_height() == 1:
                     self.app["image"].scrolled_win.hide()
                     self.app["library"].scrollable_treeview.set_hexpand(True)
             self.toggled = False
+            self.app["image"].restore()
         # Open thumbnail mode differently depending on where we come from
         elif self.app.paths and self.app["image"].scrolled_win.is_focus():
             self.last_focused = "im"
@@ -115,7 +121,10 @@ class Thumbnail(AppComponent):
         elif self.app["library"].files \
                 and self.app["library"].treeview.is_focus():
             self.last_focused = "lib"
-            self.app.paths, self.app.index = populate(self.app["library"].files)
+            check_amount = self.app.settings["GENERAL"]["image_check_amount"]
+            self.app.paths, self.app.index = populate(
+                self.app["library"].files, check_amount=check_amount)
+            self.app.directory_paths = self.app.paths
             if self.app.paths:
                 self.app["library"].scrollable_treeview.set_hexpand(False)
                 self.app["image"].scrolled_win.show()
@@ -129,6 +138,9 @@ class Thumbnail(AppComponent):
         # Manipulate bar is useless in thumbnail mode
         if self.app["manipulate"].scrolled_win.is_visible():
             self.app["manipulate"].toggle()
+        # The image is not visible in thumbnail mode
+        if self.toggled:
+            self.app["image"].release()
         # Update info for the current mode
         self.app["statusbar"].update_info()
 
@@ -165,19 +177,9 @@ class Thumbnail(AppComponent):
         self.iconview.show()
         self.toggled = True
 
-        # Add initial placeholder for all thumbnails
-        default_pixbuf_max = GdkPixbuf.Pixbuf.new_from_file_at_scale(
-            self.thumbnail_manager.default_icon,
-            *self.get_zoom_level(), True)
-        size = self.get_zoom_level()[0]
-        default_pixbuf = self.thumbnail_manager.scale_pixbuf(default_pixbuf_max,
-                                                             size)
-        for path in self.app.paths:
-            name = self._get_name(path)
-            self.liststore.append([default_pixbuf, name])
-
-        # Generate thumbnails asynchronously
-        self.reload_all(ignore_cache=True)
+        # Add placeholders and generate thumbnails asynchronously
+        self.generation += 1
+        self.append(self.app.paths)
 
         # Set columns
         self.calculate_columns()
@@ -187,19 +189,90 @@ class Thumbnail(AppComponent):
         pos = self.app.index % len(self.app.paths)
         self.move_to_pos(pos)
 
+    def append(self, paths):
+        """Append thumbnails of paths to the end of the iconview.
+
+        Used by show and while the imagelist grows during a scan.
+
+        Args:
+            paths: List of paths to append.
+        """
+        start = len(self.liststore)
+        # Add initial placeholder for all thumbnails
+        size = self.get_zoom_level()[0]
+        default_pixbuf = self._get_default_pixbuf()
+        for path in paths:
+            name = self._get_name(path)
+            self.liststore.append([default_pixbuf, name])
+
+        # Index the metadata for the statusbar in the background
+        index_async(paths, self._on_metadata_read)
+
+        # Generate thumbnails asynchronously
+        for i, path in enumerate(paths, start):
+            self._request(path, i, size, ignore_cache=True)
+
+    def update(self, removed, added, modified):
+        """Apply changes of the imagelist to the iconview.
+
+        Only the changed rows are touched, thumbnails of the other rows and
+        pending requests are kept.
+
+        Args:
+            removed: Positions of the removed paths in the old imagelist.
+            added: Positions of the added paths in the new imagelist.
+            modified: Paths of which the thumbnail has to be created again.
+        """
+        for position in sorted(removed, reverse=True):
+            self.liststore.remove(self.liststore.get_iter(position))
+        default_pixbuf = self._get_default_pixbuf()
+        size = self.get_zoom_level()[0]
+        for position in sorted(added):
+            path = self.app.paths[position]
+            self.liststore.insert(position, [default_pixbuf,
+                                             self._get_name(path)])
+            self._request(path, position, size, ignore_cache=True)
+        for path in modified:
+            self.reload(path)
+
     def reload_all(self, ignore_cache=False):
         size = self.get_zoom_level()[0]
         for i, path in enumerate(self.app.paths):
-            self.thumbnail_manager.get_thumbnail_at_scale_async(
-                path, size, self._on_thumbnail_created, i,
-                ignore_cache=ignore_cache)
+            self._request(path, i, size, ignore_cache)
 
-    def _on_thumbnail_created(self, pixbuf, position):
+    def _request(self, path, position, size, ignore_cache=False):
+        """Create the thumbnail of path for the row at position.
+
+        The row is tracked by a Gtk.TreeRowReference so the thumbnail ends up
+        in the right row if rows are inserted or removed meanwhile.
+        """
+        row = Gtk.TreeRowReference.new(self.liststore, Gtk.TreePath(position))
+        self.thumbnail_manager.get_thumbnail_at_scale_async(
+            path, size, self._on_thumbnail_created, row, self.generation,
+            ignore_cache=ignore_cache)
+
+    def _on_thumbnail_created(self, pixbuf, row, generation):
+        # The liststore was filled again meanwhile, e.g. after sorting, or the
+        # row was removed
+        if generation != self.generation or not row.valid():
+            return
         # Subsctipting the liststore directly works fine
         # pylint: disable=unsubscriptable-object
-        self.liststore[position][0] = pixbuf
+        self.liststore[row.get_path()][0] = pixbuf
         self.move_to_pos(self.app.get_pos(force_widget="thu"))
 
+    def _get_default_pixbuf(self):
+        default_pixbuf_max = GdkPixbuf.Pixbuf.new_from_file_at_scale(
+            self.thumbnail_manager.default_icon,
+            *self.get_zoom_level(), True)
+        return self.thumbnail_manager.scale_pixbuf(default_pixbuf_max,
+                                                   self.get_zoom_level()[0])
+
+    def _on_metadata_read(self, metadata):
+        if self.toggled:
+            self.app["statusbar"].update_info()
+        return False  # To stop the idle callback
+
     def _get_name(self, filename):
         name = os.path.splitext(os.path.basename(filename))[0]
         if filename in self.app["mark"].marked:
@@ -222,9 +295,8 @@ class Thumbnail(AppComponent):
 
         # pylint: disable=unsubscriptable-object
         if reload_image:
-            self.thumbnail_manager.get_thumbnail_at_scale_async(
-                filename, self.get_zoom_level()[0],
-                self._on_thumbnail_created, index, ignore_cache=True)
+            self._request(filename, index, self.get_zoom_level()[0],
+                          ignore_cache=True)
 
         self.liststore[index][1] = name
 
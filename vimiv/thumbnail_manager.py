@@ -107,6 +107,30 @@ class ThumbnailManager:
     def _do_callback(result):
         GLib.idle_add(*result)
 
+    def get_cached_thumbnail(self, filename):
+        """Return the thumbnail of 'filename' if it was created before.
+
+        In contrast to get_thumbnail_at_scale_async no thumbnail is created,
+        only the in-memory cache and existing thumbnail files are used.
+
+        Args:
+            filename: The filename to get the thumbnail for.
+        Return:
+            The thumbnail pixbuf or None if there is no thumbnail yet.
+        """
+        if filename in self._cache:
+            return self._cache[filename]
+        thumbnail_path = self.thumbnail_store.get_thumbnail(filename,
+                                                            create=False)
+        if thumbnail_path is None:
+            return None
+        try:
+            pixbuf = Pixbuf.new_from_file(thumbnail_path)
+        except GError:
+            return None
+        self._cache[filename] = pixbuf
+        return pixbuf
+
     def get_thumbnail_at_scale_async(self, filename, size, callback, *args,
                                      ignore_cache=False):
         """Create the thumbnail for 'filename' and return it via 'callback'.
@@ -169,7 +193,7 @@ class ThumbnailStore(object):
             self.thumbnail_dir = os.path.join(self.base_dir, "normal")
             self.thumb_size = 128
 
-    def get_thumbnail(self, filename):
+    def get_thumbnail(self, filename, create=True):
         """Get the path of the thumbnail of the given filename.
 
         If the requested thumbnail does not yet exist, it will first be created
@@ -177,6 +201,7 @@ class ThumbnailStore(object):
 
         Args:
             filename: The filename to get the thumbnail for.
+            create: If False, do not create missing thumbnails.
 
         Returns:
             The path of the thumbnail file or None if thumbnail creation failed.
@@ -197,7 +222,7 @@ class ThumbnailStore(object):
             # failed; don't try again.
             return None
 
-        if self._create_thumbnail(filename, thumbnail_filename):
+        if create and self._create_thumbnail(filename, thumbnail_filename):
             return thumbnail_path
 
         return None
@@ -0,0 +1,225 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Search for images in the background.
+
+RecursiveWalker scans every directory with os.scandir in a worker of a thread
+pool. Subdirectories found are scanned concurrently, files are classified in
+the same worker. LineWalker reads paths line by line from a stream such as
+stdin in a thread and classifies them in batches.
+
+Both pass images to a callback in the main loop as soon as a batch was
+classified, so the first images can be shown long before all of them were
+found.
+"""
+
+import os
+from abc import ABC, abstractmethod
+from multiprocessing.pool import ThreadPool as Pool
+from threading import Lock, Thread
+
+from gi.repository import GLib
+
+from vimiv.fileactions import has_image_extension, is_image
+
+
+class Walker(ABC):
+    """Base class of walkers reporting images in batches.
+
+    Subclasses implement _start to begin searching the source passed to walk.
+
+    Attributes:
+        check_amount: Amount of files up to which the content of every file is
+            checked. Afterwards files with known image extensions are trusted.
+            See fileactions.populate.
+        checked: Amount of files classified so far.
+        running: True while images are still being searched.
+    """
+
+    # Searching waits on the disk most of the time
+    _thread_pool = Pool(max(4, 2 * (os.cpu_count() or 1)))
+
+    def __init__(self, check_amount=-1):
+        """Create the walker.
+
+        Args:
+            check_amount: See the check_amount attribute.
+        """
+        self.check_amount = check_amount
+        self.checked = 0
+        self.running = False
+        self._callback = None
+        self._finished_callback = None
+        self._lock = Lock()
+        self._generation = 0
+
+    def walk(self, source, callback, finished_callback):
+        """Start searching source for images.
+
+        Args:
+            source: Where to search, e.g. a list of directories for
+                RecursiveWalker or a stream of lines for LineWalker.
+            callback: Callable of form callback(images) called in the main
+                loop with each batch of images found.
+            finished_callback: Callable called in the main loop once the
+                search is done.
+        """
+        self.stop()
+        self._callback = callback
+        self._finished_callback = finished_callback
+        self.checked = 0
+        self.running = True
+        self._start(source, self._generation)
+
+    def stop(self):
+        """Stop searching, results of running searches are dropped."""
+        with self._lock:
+            self._generation += 1
+            self.running = False
+
+    @abstractmethod
+    def _start(self, source, generation):
+        """Start searching source in the background.
+
+        Batches of images are passed to _emit and _finish is called once done,
+        both with generation so results of stopped searches are dropped.
+
+        Args:
+            source: The source passed to walk.
+            generation: Generation of this search.
+        """
+
+    def _classify(self, path):
+        with self._lock:
+            self.checked += 1
+            trust_extension = 0 <= self.check_amount < self.checked
+        if trust_extension:
+            return has_image_extension(path) or is_image(path)
+        return is_image(path)
+
+    def _finish(self, generation):
+        # Added after all image callbacks and therefore run after them
+        GLib.idle_add(self._emit_finished, generation)
+
+    def _emit(self, images, generation):
+        if generation == self._generation:
+            self._callback(images)
+        return False  # To stop the idle callback
+
+    def _emit_finished(self, generation):
+        if generation == self._generation:
+            self.running = False
+            self._finished_callback()
+        return False  # To stop the idle callback
+
+
+class RecursiveWalker(Walker):
+    """Walk directory trees in parallel and report images of each directory.
+
+    The source is a list of directories. The batches passed to callback
+    contain the sorted images of one directory.
+    """
+
+    def __init__(self, check_amount=-1):
+        super().__init__(check_amount)
+        self._pending = 0
+
+    def stop(self):
+        """Stop searching, results of running scans are dropped."""
+        with self._lock:
+            self._generation += 1
+            self._pending = 0
+            self.running = False
+
+    def _start(self, directories, generation):
+        for directory in directories:
+            self._submit(directory, generation)
+        if not directories:
+            self._finish(generation)
+
+    def _submit(self, directory, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._pending += 1
+        self._thread_pool.apply_async(
+            self._scan, (directory, generation), callback=self._on_scanned,
+            error_callback=lambda error: self._done(generation))
+
+    def _scan(self, directory, generation):
+        images = []
+        subdirectories = []
+        if generation != self._generation:
+            return generation, images, subdirectories
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    # Do not follow symbolic links to directories like os.walk
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                    elif entry.is_file() and self._classify(entry.path):
+                        images.append(entry.path)
+        except OSError:
+            pass
+        return generation, sorted(images), sorted(subdirectories)
+
+    def _on_scanned(self, result):
+        generation, images, subdirectories = result
+        # Submit subdirectories first so pending never drops to zero early
+        for subdirectory in subdirectories:
+            self._submit(subdirectory, generation)
+        if images:
+            GLib.idle_add(self._emit, images, generation)
+        self._done(generation)
+
+    def _done(self, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._pending -= 1
+            finished = self._pending == 0
+        if finished:
+            self._finish(generation)
+
+
+class LineWalker(Walker):
+    """Read paths from a stream line by line and report the images.
+
+    The source is an iterable of lines such as sys.stdin, it is read in a
+    thread. The order of the stream is kept. The first batch contains a single
+    path so it can be shown immediately, every following batch is twice as
+    large up to max_batch.
+
+    Attributes:
+        max_batch: Maximum amount of lines classified in one batch.
+    """
+
+    def __init__(self, check_amount=-1, max_batch=1024):
+        super().__init__(check_amount)
+        self.max_batch = max_batch
+
+    def _start(self, stream, generation):
+        Thread(target=self._read, args=(stream, generation),
+               daemon=True).start()
+
+    def _read(self, stream, generation):
+        batch = []
+        size = 1
+        try:
+            for line in stream:
+                if generation != self._generation:
+                    return
+                batch.append(os.path.abspath(line.rstrip("\n")))
+                if len(batch) >= size:
+                    self._classify_batch(batch, generation)
+                    batch = []
+                    size = min(2 * size, self.max_batch)
+        except (OSError, TypeError, ValueError):
+            pass  # E.g. DebugConsoleStdIn is not iterable
+        self._classify_batch(batch, generation)
+        self._finish(generation)
+
+    def _classify_batch(self, paths, generation):
+        paths = [path for path in paths if os.path.isfile(path)]
+        found = self._thread_pool.map(self._classify, paths)
+        images = [path for path, image in zip(paths, found) if image]
+        if images:
+            GLib.idle_add(self._emit, images, generation)
@@ -0,0 +1,173 @@
+# vim: ft=python fileencoding=utf-8 sw=4 et sts=4
+"""Watch the directories shown by vimiv for changes.
+
+The current directory of the library and the directories of all paths in the
+imagelist are monitored using Gio.FileMonitor, which is backed by inotify on
+Linux. Events are collected for a short time and then applied to the library
+and the imagelist without listing any directory again.
+"""
+
+import os
+
+from gi._error import GError
+from gi.repository import Gio, GLib
+
+from vimiv.app_component import AppComponent
+from vimiv.fileactions import FileExtras
+from vimiv.library import Library
+
+
+class Watcher(AppComponent):
+    """Monitor directories and apply changes of their files.
+
+    Attributes:
+        enabled: If True watch directories.
+        delay: Time in ms for which events are collected before applying them.
+        max_monitors: Maximum amount of directories watched.
+        monitors: Dictionary of monitors, monitors[directory] = Gio.FileMonitor.
+        changed: Set of paths which changed since the last update.
+        renamed: Dictionary of files renamed since the last update,
+            renamed[old] = new.
+        timer_id: ID of the GLib.Timeout applying the changes.
+        update_id: ID of the GLib.Timeout updating the watched directories.
+    """
+
+    def __init__(self, app, settings):
+        """Create the necessary objects and settings.
+
+        Args:
+            app: The main vimiv application to interact with.
+            settings: Settings from configfiles to use.
+        """
+        super().__init__(app)
+        self.enabled = settings["GENERAL"]["watch_directories"]
+        self.delay = 200
+        self.max_monitors = 1000
+        self.monitors = {}
+        self.changed = set()
+        self.renamed = {}
+        self.timer_id = 0
+        self.update_id = 0
+        self._paths = None
+        self._n_paths = 0
+        self._directories = set()
+        if self.enabled:
+            # Checks if the watched directories changed, very cheap if not
+            self.update_id = GLib.timeout_add_seconds(1, self.update_monitors)
+
+    def update_monitors(self):
+        """Watch the current directory and the directories of the imagelist.
+
+        Only paths added since the last call are processed if the imagelist
+        was not replaced.
+        """
+        paths = self.app.paths
+        if paths is not self._paths or len(paths) < self._n_paths:
+            self._paths = paths
+            self._n_paths = 0
+            self._directories = set()
+        if len(paths) > self._n_paths:
+            self._directories.update(
+                os.path.dirname(path) for path in paths[self._n_paths:])
+            self._n_paths = len(paths)
+        wanted = set([os.getcwd()])
+        for directory in self._directories:
+            if len(wanted) >= self.max_monitors:
+                break
+            wanted.add(directory)
+        for directory in set(self.monitors) - wanted:
+            self.monitors.pop(directory).cancel()
+        for directory in wanted - set(self.monitors):
+            self._watch(directory)
+        return True  # To keep the timer running
+
+    def stop(self):
+        """Stop watching all directories."""
+        self.enabled = False
+        for monitor in self.monitors.values():
+            monitor.cancel()
+        self.monitors = {}
+        for source_id in [self.timer_id, self.update_id]:
+            if source_id:
+                GLib.source_remove(source_id)
+        self.timer_id = self.update_id = 0
+
+    def _watch(self, directory):
+        try:
+            monitor = Gio.File.new_for_path(directory).monitor_directory(
+                Gio.FileMonitorFlags.WATCH_MOVES, None)
+        except GError:
+            return  # E.g. directory removed or too many watches
+        monitor.connect("changed", self._on_changed)
+        self.monitors[directory] = monitor
+
+    def _on_changed(self, monitor, fil, other_file, event_type):
+        if not self.enabled:
+            return
+        self.changed.add(fil.get_path())
+        if other_file is not None:
+            self.changed.add(other_file.get_path())
+            if event_type == Gio.FileMonitorEvent.RENAMED:
+                self._add_rename(fil.get_path(), other_file.get_path())
+        if not self.timer_id:
+            self.timer_id = GLib.timeout_add(self.delay, self.apply_changes)
+
+    def apply_changes(self):
+        """Apply all changes collected to the library and the imagelist.
+
+        The type of change is found from the state of the file now, so any
+        sequence of events is reduced to removed, added or modified.
+        """
+        self.timer_id = 0
+        changed = self.changed
+        self.changed = set()
+        renamed = self.renamed
+        self.renamed = {}
+        self._update_library(changed)
+        self._update_paths(changed, renamed)
+        return False  # To stop the timer
+
+    def _add_rename(self, old, new):
+        # Files renamed several times are renamed from their first name
+        for source, target in self.renamed.items():
+            if target == old:
+                self.renamed[source] = new
+                return
+        self.renamed[old] = new
+
+    def _update_library(self, changed):
+        library = self.get_component(Library)
+        cwd = os.getcwd()
+        removed, added, modified = [], [], []
+        for path in changed:
+            if os.path.dirname(path) != cwd:
+                continue
+            fil = os.path.basename(path)
+            exists = os.path.lexists(path)
+            if fil in library.files:
+                (modified if exists else removed).append(fil)
+            elif exists:
+                added.append(fil)
+        if removed or added or modified:
+            library.update_files(removed, added, modified)
+
+    def _update_paths(self, changed, renamed):
+        directories = set(self.monitors)
+        # Lists of single files are not extended by the watcher
+        from_directory = self.app.paths_from_directory
+        known = set(self.app.paths)
+        removed, added, modified = set(), [], []
+        for path in changed:
+            exists = os.path.isfile(path)
+            if path in known:
+                if exists:
+                    modified.append(path)
+                else:
+                    removed.add(path)
+            elif exists and from_directory \
+                    and os.path.dirname(path) in self._directories \
+                    and os.path.dirname(path) in directories:
+                added.append(path)
+        if removed or added or modified:
+            self.get_component(FileExtras).update_paths(
+                removed, sorted(added), modified, renamed)
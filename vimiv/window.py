@@ -1,7 +1,7 @@
 # vim: ft=python fileencoding=utf-8 sw=4 et sts=4
 """Window class for vimiv."""
 
-from gi.repository import Gdk, Gtk
+from gi.repository import Gdk, GLib, Gtk
 
 
 class Window(Gtk.ApplicationWindow):
@@ -13,6 +13,8 @@ class Window(Gtk.ApplicationWindow):
         app: The main vimiv application to interact with.
         fullscreen: If True, the window is displayed fullscreen.
         winsize: The windowsize as tuple.
+        relayout_id: Id of the idle callback re-layouting widgets after the
+            window was resized.
     """
 
     def __init__(self, app, settings):
@@ -45,6 +47,7 @@ class Window(Gtk.ApplicationWindow):
         except (ValueError, IndexError):
             self.winsize = (800, 600)
         self.resize(self.winsize[0], self.winsize[1])
+        self.relayout_id = 0
 
         # Fullscreen
         if Gtk.get_minor_version() > 10:
@@ -96,12 +99,24 @@ class Window(Gtk.ApplicationWindow):
         """
         if self.get_size() != self.winsize:
             self.winsize = self.get_size()
-            if self.app.paths:
-                if self.app["thumbnail"].toggled:
-                    self.app["thumbnail"].calculate_columns()
-                if self.app["image"].fit_image and \
-                        not self.app["image"].is_anim:
-                    self.app["image"].zoom_to(0, self.app["image"].fit_image)
+            # Many resize events are emitted while resizing, only re-layout
+            # once the pending events have been handled
+            if self.app.paths and not self.relayout_id:
+                self.relayout_id = GLib.idle_add(self.relayout)
+
+    def relayout(self):
+        """Re-layout thumbnails and image after the window was resized.
+
+        The image is rescaled quickly and refined once resizing stops.
+        """
+        self.relayout_id = 0
+        if self.app.paths:
+            if self.app["thumbnail"].toggled:
+                self.app["thumbnail"].calculate_columns()
+            if self.app["image"].fit_image:
+                self.app["image"].zoom_to(0, self.app["image"].fit_image,
+                                          quick=True)
+        return False  # To stop the idle callback
 
     def focus_on_mouse_click(self, widget, event_button):
         """Update statusbar with the currently focused widget after mouse click.